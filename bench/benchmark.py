@@ -0,0 +1,187 @@
+"""Route benchmarks over synthetic plant data at several scales.
+
+For each scale, a fresh process builds a seeded database with
+plant_data.generate_plant() and drives the real routes through the Flask
+test client. It reports latency percentiles, SQL statements per request and
+peak Python memory per request.
+
+    python bench/benchmark.py --scales 1000,10000 --save bench/baseline.json
+    python bench/benchmark.py --scales 1000,10000 --compare bench/baseline.json
+
+With --compare, any route whose p95 latency or query count grows by more
+than --threshold percent is reported, and the exit status is 1.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from plant_data import load_app, generate_plant, operator_names
+
+BENCH_CONFIG = {"QR_PRERENDER": False}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def scenarios(order_numbers, operators, rng):
+    """Yield (name, session_user, session_role, method, path, form) request descriptions."""
+    manager = ("BENCH MANAGER", "manager")
+
+    def operator():
+        return rng.choice(operators), "operator"
+
+    search_terms = ["END", "ACME", "PO-1", "WO00", "DRILL D6", "OPERATOR 00"]
+    yield "manager_dashboard", *manager, "GET", "/manager_dashboard/BENCH MANAGER", None
+    yield "operator_efficiency", *manager, "GET", "/operator_efficiency", None
+    yield "search_workorders", *manager, "GET", f"/search_workorders?q={rng.choice(search_terms)}", None
+    yield "order_log", *manager, "POST", "/order_log", {"work_order_no": rng.choice(order_numbers)}
+    user, role = operator()
+    order_no = rng.choice(order_numbers)
+    yield "scan", user, role, "POST", "/scan", {"work_order_no": order_no, "username": user, "machine": "CNC1"}
+    yield "finish_order", user, role, "POST", f"/finish_order/{order_no}", {"quantity": "1", "action": "partial"}
+
+
+def run_scale(orders, operators, rejections, iterations, seed, results):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, "bench.db"), BENCH_CONFIG)
+        from sqlalchemy import event
+        from mes.extensions import db
+        start = time.perf_counter()
+        order_numbers = generate_plant(app, orders, operators, rejections, seed=seed)
+        build_seconds = time.perf_counter() - start
+
+        statements = [0]
+        with app.app_context():
+            engine = db.engine
+
+        def count_statement(*args):
+            statements[0] += 1
+        event.listen(engine, "before_cursor_execute", count_statement)
+
+        client = app.test_client()
+        names = operator_names(operators)
+        rng = random.Random(seed)
+        samples = {}
+        tracemalloc.start()
+        for _ in range(iterations):
+            for name, user, role, method, path, form in scenarios(order_numbers, names, rng):
+                with client.session_transaction() as sess:
+                    sess["username"] = user
+                    sess["role"] = role
+                statements[0] = 0
+                tracemalloc.reset_peak()
+                t0 = time.perf_counter()
+                response = client.open(path, method=method, data=form)
+                elapsed = time.perf_counter() - t0
+                peak = tracemalloc.get_traced_memory()[1]
+                if response.status_code >= 500:
+                    raise RuntimeError(f"{name} returned {response.status_code}")
+                sample = samples.setdefault(name, {"latency": [], "queries": [], "peak": []})
+                sample["latency"].append(elapsed)
+                sample["queries"].append(statements[0])
+                sample["peak"].append(peak)
+        tracemalloc.stop()
+
+    routes = {}
+    for name, sample in samples.items():
+        routes[name] = {
+            "p50_ms": round(percentile(sample["latency"], 50) * 1000, 2),
+            "p95_ms": round(percentile(sample["latency"], 95) * 1000, 2),
+            "p99_ms": round(percentile(sample["latency"], 99) * 1000, 2),
+            "queries": round(sum(sample["queries"]) / len(sample["queries"]), 1),
+            "peak_kb": round(max(sample["peak"]) / 1024, 1),
+        }
+    results.put({"orders": orders, "build_s": round(build_seconds, 1), "routes": routes})
+
+
+def print_scale(result):
+    print(f"\n{result['orders']} orders (generated in {result['build_s']} s)")
+    print(f"  {'route':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KB':>10}")
+    for name, r in result["routes"].items():
+        print(f"  {name:<22}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+              f"{r['queries']:>9.1f}{r['peak_kb']:>10.1f}")
+
+
+def compare(current, baseline, threshold):
+    """Return human-readable regressions of current against a saved baseline."""
+    regressions = []
+    previous = {str(s["orders"]): s for s in baseline["scales"]}
+    for scale in current["scales"]:
+        old = previous.get(str(scale["orders"]))
+        if old is None:
+            continue
+        for name, r in scale["routes"].items():
+            before = old["routes"].get(name)
+            if before is None:
+                continue
+            for metric in ("p95_ms", "queries"):
+                if before[metric] and r[metric] > before[metric] * (1 + threshold / 100):
+                    regressions.append(
+                        f"{scale['orders']} orders / {name}: {metric} "
+                        f"{before[metric]} -> {r[metric]}"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1000,10000,50000", help="comma-separated order counts")
+    parser.add_argument("--operators", type=int, default=40)
+    parser.add_argument("--rejections-per-order", type=float, default=0.05)
+    parser.add_argument("--iterations", type=int, default=30, help="passes over every route")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed growth in percent")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "iterations": args.iterations,
+        "seed": args.seed,
+        "scales": [],
+    }
+    for orders in (int(s) for s in args.scales.split(",")):
+        results = ctx.Queue()
+        proc = ctx.Process(target=run_scale, args=(
+            orders, args.operators, int(orders * args.rejections_per_order),
+            args.iterations, args.seed, results
+        ))
+        proc.start()
+        result = results.get()
+        proc.join()
+        report["scales"].append(result)
+        print_scale(result)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\nRegressions over {args.threshold:g}%:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
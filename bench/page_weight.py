@@ -0,0 +1,115 @@
+"""Bytes a tablet transfers per page load, first visit and repeat visit.
+
+Builds a small seeded plant, then loads each page through the Flask test
+client the way a browser would: the HTML, then every same-origin stylesheet,
+script and image it references. A repeat visit replays the same loads with
+the browser's HTTP cache: responses still fresh are not requested again,
+stale ones are revalidated with If-None-Match / If-Modified-Since.
+Body bytes are counted as sent, i.e. compressed when Content-Encoding is set.
+
+    python bench/page_weight.py --orders 1000
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from plant_data import load_app, generate_plant
+
+BENCH_CONFIG = {"QR_PRERENDER": False}
+ACCEPT_ENCODING = "gzip, deflate, br"
+RESOURCE_PATTERN = re.compile(r'<(?:link|script|img)\b[^>]*?(?:href|src)="(/[^"/][^"]*)"')
+
+
+def pages(order_no):
+    manager = ("BENCH MANAGER", "manager")
+    operator = ("OPERATOR 001", "operator")
+    yield "login", None, "/login"
+    yield "manager_dashboard", manager, "/manager_dashboard/BENCH MANAGER"
+    yield "workorders", manager, "/workorders"
+    yield "dispatch", manager, "/dispatch"
+    yield "operator_efficiency", manager, "/operator_efficiency"
+    yield "create_order", manager, "/create_order"
+    yield "export", manager, "/export"
+    yield "operator_dashboard", operator, "/operator_dashboard/OPERATOR 001"
+    yield "scan", operator, "/scan"
+    yield "finish_order", operator, f"/finish_order/{order_no}"
+
+
+class BrowserCache:
+    """Just enough of an HTTP cache to tell fresh, revalidated and refetched responses apart."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def fetch(self, client, path):
+        """Return (body bytes transferred, whether a request was sent)."""
+        entry = self.entries.get(path)
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if entry:
+            if entry["expires"] > time.time():
+                return 0, False
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = client.get(path, headers=headers)
+        body = response.get_data()
+        response.close()
+        if response.status_code == 304:
+            return 0, True
+        cache_control = response.cache_control
+        max_age = 0 if cache_control.no_cache or cache_control.no_store else (cache_control.max_age or 0)
+        if response.headers.get("ETag") or response.headers.get("Last-Modified") or max_age:
+            self.entries[path] = {
+                "expires": time.time() + max_age,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+        return len(body), True
+
+
+def load_page(client, cache, path):
+    """Load a page and its resources. Returns (HTML bytes, resource bytes, requests)."""
+    response = client.get(path, headers={"Accept-Encoding": ACCEPT_ENCODING})
+    html_bytes = len(response.get_data())
+    html = response.get_data(as_text=True) if not response.headers.get("Content-Encoding") \
+        else client.get(path).get_data(as_text=True)
+    resource_bytes, requests = 0, 1
+    for resource in dict.fromkeys(RESOURCE_PATTERN.findall(html)):
+        transferred, sent = cache.fetch(client, resource)
+        resource_bytes += transferred
+        requests += sent
+    return html_bytes, resource_bytes, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--operators", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = load_app(os.path.join(tmp, "weight.db"), BENCH_CONFIG)
+        order_numbers = generate_plant(app, args.orders, args.operators, args.orders // 20)
+        client = app.test_client()
+
+        print(f"{'page':<22}{'HTML':>9}{'first':>9}{'repeat':>9}{'reqs':>6}{'repeat reqs':>13}")
+        totals = [0, 0, 0]
+        for name, user, path in pages(order_numbers[-1]):
+            with client.session_transaction() as sess:
+                sess.clear()
+                if user:
+                    sess["username"], sess["role"] = user
+            cache = BrowserCache()
+            html, resources, requests = load_page(client, cache, path)
+            repeat_html, repeat_resources, repeat_requests = load_page(client, cache, path)
+            first, repeat = html + resources, repeat_html + repeat_resources
+            totals = [totals[0] + html, totals[1] + first, totals[2] + repeat]
+            print(f"{name:<22}{html:>9}{first:>9}{repeat:>9}{requests:>6}{repeat_requests:>13}")
+        print(f"{'total':<22}{totals[0]:>9}{totals[1]:>9}{totals[2]:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Seeded synthetic plant data for benchmarks and stress tests.
+
+generate_plant() fills an empty database with operators, work orders,
+rejections and the event history derived from them, using distributions
+loosely modelled on the shop floor: most history is completed, quantities
+are skewed towards small batches, and tools come from a catalogue of common
+cutter geometries.
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (diameter, flute_length, overall_length) in mm
+TOOL_CATALOGUE = [
+    (3.0, 12.0, 50.0), (4.0, 14.0, 50.0), (5.0, 16.0, 60.0), (6.0, 20.0, 60.0),
+    (8.0, 24.0, 75.0), (10.0, 30.0, 75.0), (12.0, 36.0, 100.0), (16.0, 45.0, 100.0),
+]
+CLIENTS = ["ACME TOOLS", "BHARAT FORGE", "KINETIC", "MAHINDRA", "SANDVIK", "TATA AUTOCOMP"]
+PARTS = ["END MILL", "BALL NOSE", "DRILL", "REAMER", "CHAMFER", "T-SLOT"]
+MACHINES = ["CNC1", "CNC2", "TNC1", "TNC2", "Cylindrical1", "Cylindrical2"]
+REJECTION_REASONS = ["Diameter oversize", "Runout", "Chipped edge", "Burr", "Wrong helix"]
+# Share of orders in each status; history is mostly completed work
+STATUS_WEIGHTS = {
+    "Completed": 0.70, "Waiting for Handover": 0.08, "In Progress": 0.07,
+    "Partial": 0.05, "Not Started": 0.10,
+}
+
+
+def load_app(db_path, config=None):
+    """Build an app against a separate database file, like a fresh worker process.
+
+    Returns the app; the mes package is importable afterwards.
+    """
+    os.chdir(REPO_ROOT)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from app import create_app
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "AGGREGATE_CACHE_PATH": os.path.join(os.path.dirname(db_path), "cache.db"),
+        **(config or {}),
+    })
+    return app
+
+
+def operator_names(count):
+    return [f"OPERATOR {i:03d}" for i in range(count)]
+
+
+def generate_plant(app, orders, operators, rejections, days=365, seed=42):
+    """Populate an empty database. Returns the generated work order numbers."""
+    from sqlalchemy import text
+    from mes.extensions import db
+    from mes.migrations import migrate_database
+    from mes.models import RejectionLog, User, WorkOrder
+    from mes.services.geometry import rebuild_tool_geometry
+    from mes.services.history import seed_workorder_events
+    from mes.services.operator_stats import rebuild_operator_daily_stats
+    from mes.services.search import ensure_search_index
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    names = operator_names(operators)
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+
+    with app.app_context():
+        migrate_database()
+        db.session.execute(User.__table__.insert(), [
+            {"username": name, "pin": "000000", "role": "operator", "must_change_pin": False}
+            for name in names
+        ] + [{"username": "BENCH MANAGER", "pin": "000000", "role": "manager",
+              "must_change_pin": False}])
+
+        order_rows = []
+        for i in range(orders):
+            created = now - timedelta(days=days * (1 - i / max(orders, 1)), hours=rng.random() * 8)
+            status = rng.choices(statuses, weights)[0]
+            quantity = max(1, int(rng.lognormvariate(3.0, 0.8)))
+            diameter, flute_length, overall_length = rng.choice(TOOL_CATALOGUE)
+            row = {
+                "work_order_no": f"WO{i:07d}",
+                "client_name": rng.choice(CLIENTS),
+                "po_number": f"PO-{rng.randint(10000, 99999)}",
+                "part_name": f"{rng.choice(PARTS)} D{diameter:g}",
+                "quantity": quantity,
+                "completed_qty": 0,
+                "rejected_qty": 0,
+                "diameter": diameter,
+                "flute_length": flute_length,
+                "overall_length": overall_length,
+                "due_date": (created + timedelta(days=rng.randint(3, 30))).date(),
+                "status": status,
+                "current_operator": None,
+                "current_machine": None,
+                "start_time": None,
+                "end_time": None,
+                "last_handover_time": None,
+            }
+            if status != "Not Started":
+                start = created + timedelta(hours=rng.uniform(1, 48))
+                row.update(current_operator=rng.choice(names), current_machine=rng.choice(MACHINES),
+                           start_time=start)
+                if status in ("Completed", "Waiting for Handover", "Partial"):
+                    # Cycle time grows with batch size, with operator-to-operator spread
+                    end = start + timedelta(minutes=quantity * rng.uniform(2, 8))
+                    row["end_time"] = min(end, now)
+                    row["completed_qty"] = quantity if status != "Partial" else rng.randint(1, quantity)
+                if rng.random() < 0.3:
+                    row["last_handover_time"] = start + (row["end_time"] - start) / 2 \
+                        if row["end_time"] else start + timedelta(hours=1)
+            order_rows.append(row)
+        db.session.execute(WorkOrder.__table__.insert(), order_rows)
+
+        order_ids = [oid for (oid,) in db.session.query(WorkOrder.id)
+                     .filter(WorkOrder.start_time.isnot(None))]
+        rejection_rows = []
+        for _ in range(rejections if order_ids else 0):
+            order_id = rng.choice(order_ids)
+            rejection_rows.append({
+                "work_order_id": order_id,
+                "operator": rng.choice(names),
+                "quantity": rng.randint(1, 3),
+                "reason": rng.choice(REJECTION_REASONS),
+                "timestamp": now - timedelta(days=rng.random() * days),
+            })
+        if rejection_rows:
+            db.session.execute(RejectionLog.__table__.insert(), rejection_rows)
+            db.session.execute(text(
+                "UPDATE work_order SET rejected_qty = "
+                "(SELECT COALESCE(SUM(quantity), 0) FROM rejection_log "
+                "WHERE rejection_log.work_order_id = work_order.id)"
+            ))
+        db.session.commit()
+
+        ensure_search_index(rebuild=True)
+        seed_workorder_events()
+        rebuild_operator_daily_stats()
+        rebuild_tool_geometry()
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+    return [row["work_order_no"] for row in order_rows]
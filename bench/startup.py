@@ -0,0 +1,87 @@
+"""Cold-start time and memory of a fresh worker process.
+
+Each run starts a new interpreter that imports the app the way a gunicorn
+worker does, then serves one login page and one dashboard, and reports how
+long the import took and the process RSS after each step.
+
+    python bench/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = r"""
+import json, os, sys, time
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+start = time.perf_counter()
+from app import create_app
+from mes.migrations import migrate_database
+imported = time.perf_counter() - start
+rss_import = rss_kb()
+
+app = create_app()
+with app.app_context():
+    migrate_database()
+client = app.test_client()
+client.get("/login")
+with client.session_transaction() as sess:
+    sess["username"] = "BENCH"
+    sess["role"] = "manager"
+client.get("/manager_dashboard/BENCH")
+print(json.dumps({
+    "import_s": imported,
+    "rss_import_kb": rss_import,
+    "rss_request_kb": rss_kb(),
+    "modules": len(sys.modules),
+    "pil_loaded": "PIL.Image" in sys.modules,
+}))
+"""
+
+
+def run_worker(db_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", WORKER], cwd=REPO_ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "startup.db")
+        run_worker(db_path)  # creates the schema so later runs measure a warm database file
+        results = [run_worker(db_path) for _ in range(args.runs)]
+
+    def median(key):
+        return statistics.median(r[key] for r in results)
+
+    print(f"runs                   {args.runs}")
+    print(f"process start to exit  {median('process_s') * 1000:8.1f} ms")
+    print(f"import app             {median('import_s') * 1000:8.1f} ms")
+    print(f"RSS after import       {median('rss_import_kb') / 1024:8.1f} MB")
+    print(f"RSS after 2 requests   {median('rss_request_kb') / 1024:8.1f} MB")
+    print(f"modules loaded         {median('modules'):8.0f}")
+    print(f"PIL loaded             {'yes' if results[-1]['pil_loaded'] else 'no':>8}")
+
+
+if __name__ == "__main__":
+    main()
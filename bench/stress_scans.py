@@ -0,0 +1,157 @@
+"""Concurrency stress test for scan/finish writes on SQLite.
+
+Starts several worker processes, each with its own app and engine like
+gunicorn workers, and has them scan and finish the same small set of work
+orders at once. It then checks that every successful finish is reflected in
+completed_qty (no lost updates), that no order went over its quantity, and
+reports request latency percentiles. A small --quantity makes the workers
+race for the last units of each order.
+
+    python bench/stress_scans.py --workers 8 --iterations 100 --mode both
+
+"baseline" turns off WAL and lock retries; "tuned" uses the app defaults.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+from plant_data import load_app
+
+MODES = {
+    "baseline": {"SQLITE_WAL": False, "DB_LOCK_RETRIES": 0},
+    "tuned": {},
+}
+
+
+def setup_database(db_path, mode, orders, quantity):
+    app = load_app(db_path, MODES[mode])
+    from mes.extensions import db
+    from mes.migrations import migrate_database
+    from mes.models import WorkOrder
+    with app.app_context():
+        migrate_database()
+        for i in range(orders):
+            db.session.add(WorkOrder(
+                work_order_no=f"STRESS{i:04d}", quantity=quantity,
+                completed_qty=0, rejected_qty=0, status="Not Started"
+            ))
+        db.session.commit()
+
+
+def run_worker(db_path, mode, worker_id, iterations, orders, results):
+    app = load_app(db_path, MODES[mode])
+    rng = random.Random(worker_id)
+    username = f"STRESS OP {worker_id}"
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["username"] = username
+        sess["role"] = "operator"
+
+    latencies = []
+    finished = 0
+    failures = 0
+    for _ in range(iterations):
+        order_no = f"STRESS{rng.randrange(orders):04d}"
+        start = time.perf_counter()
+        scan = client.post("/scan", data={
+            "work_order_no": order_no, "username": username, "machine": "CNC1"
+        })
+        latencies.append(time.perf_counter() - start)
+        if scan.status_code >= 500:
+            failures += 1
+            continue
+
+        start = time.perf_counter()
+        finish = client.post(f"/finish_order/{order_no}", data={
+            "quantity": "1", "action": "partial"
+        })
+        latencies.append(time.perf_counter() - start)
+        if finish.status_code == 302:
+            finished += 1
+        elif "Cannot exceed" not in finish.get_data(as_text=True):
+            failures += 1
+    results.put((finished, failures, latencies))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def run_mode(mode, workers, iterations, orders, quantity):
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "stress.db")
+        setup = ctx.Process(target=setup_database, args=(db_path, mode, orders, quantity))
+        setup.start()
+        setup.join()
+
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=run_worker, args=(db_path, mode, i, iterations, orders, results))
+            for i in range(workers)
+        ]
+        wall_start = time.perf_counter()
+        for p in procs:
+            p.start()
+        collected = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        wall = time.perf_counter() - wall_start
+
+        finished = sum(r[0] for r in collected)
+        failures = sum(r[1] for r in collected)
+        latencies = [lat for r in collected for lat in r[2]]
+
+        import sqlite3
+        conn = sqlite3.connect(db_path)
+        recorded = conn.execute("SELECT COALESCE(SUM(completed_qty), 0) FROM work_order").fetchone()[0]
+        over = conn.execute("SELECT COUNT(*) FROM work_order "
+                            "WHERE completed_qty + rejected_qty > quantity").fetchone()[0]
+        conn.close()
+
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "failures": failures,
+        "finished": finished,
+        "recorded": recorded,
+        "lost": finished - recorded,
+        "over": over,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "wall_s": wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=100, help="scan+finish pairs per worker")
+    parser.add_argument("--orders", type=int, default=5, help="distinct orders contended for")
+    parser.add_argument("--quantity", type=int, default=10 ** 9, help="quantity of each order")
+    parser.add_argument("--mode", choices=["baseline", "tuned", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["baseline", "tuned"] if args.mode == "both" else [args.mode]
+    print(f"{'mode':<10}{'requests':>10}{'failed':>8}{'finished':>10}{'recorded':>10}"
+          f"{'lost':>6}{'over':>6}{'p50 ms':>9}{'p99 ms':>9}{'wall s':>8}")
+    lost_updates = False
+    for mode in modes:
+        r = run_mode(mode, args.workers, args.iterations, args.orders, args.quantity)
+        lost_updates = lost_updates or r["lost"] != 0 or r["over"] != 0
+        print(f"{r['mode']:<10}{r['requests']:>10}{r['failures']:>8}{r['finished']:>10}"
+              f"{r['recorded']:>10}{r['lost']:>6}{r['over']:>6}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['wall_s']:>8.1f}")
+    if lost_updates:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Work order tracking for the shop floor: models, services and routes.
+
+app.create_app() assembles them into the Flask app.
+"""
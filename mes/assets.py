@@ -0,0 +1,168 @@
+"""Content-hashed static asset URLs, precompressed static files and response compression."""
+from flask import Blueprint, request, url_for, abort, current_app, send_file
+from werkzeug.security import safe_join
+import os
+import re
+import gzip
+import mimetypes
+import hashlib
+from functools import lru_cache
+
+bp = Blueprint("assets", __name__)
+
+
+# Precompressed siblings (foo.css.br, foo.css.gz) are written by create_app() and `flask build-assets`
+ASSET_PRECOMPRESS_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt")
+COMPRESS_MIMETYPES = {"text/html", "application/json", "text/plain", "text/css", "application/javascript"}
+HASHED_ASSET_PATTERN = re.compile(r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{12})(?P<ext>\.[^./]+)$")
+
+
+@lru_cache(maxsize=1)
+def get_brotli():
+    """The brotli module, or None where it is not installed; gzip is used then."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def asset_digest(filename):
+    """Short content hash of a file under static/.
+
+    Kept per worker and recomputed only when the file's size or mtime
+    changes, so a deploy or an edit during development gets a new URL.
+    """
+    path = safe_join(current_app.static_folder, filename)
+    if path is None:
+        raise FileNotFoundError(filename)
+    stat = os.stat(path)
+    hashes = current_app.extensions.setdefault("asset_hashes", {})
+    cached = hashes.get(filename)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    hashes[filename] = ((stat.st_mtime_ns, stat.st_size), digest)
+    return digest
+
+
+@bp.app_template_global()
+def asset_url(filename):
+    """URL of a static file with its content hash in the name, e.g. /assets/css/scan.1a2b3c4d5e6f.css."""
+    stem, ext = os.path.splitext(filename)
+    return url_for("assets.asset", filename=f"{stem}.{asset_digest(filename)}{ext}")
+
+
+def accepted_encoding(available):
+    """The best of the available content codings ("br", "gzip") the client accepts, or None."""
+    accept = request.accept_encodings
+    for encoding in ("br", "gzip"):
+        if encoding in available and accept[encoding]:
+            return encoding
+    return None
+
+
+@bp.route("/assets/<path:filename>")
+def asset(filename):
+    match = HASHED_ASSET_PATTERN.match(filename)
+    if not match:
+        abort(404)
+    source = match["stem"] + match["ext"]
+    path = safe_join(current_app.static_folder, source)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    # A page rendered before a deploy may still ask for the old hash: answer with the
+    # current file, but only the exact hash is safe to cache for good
+    current = match["digest"] == asset_digest(source)
+
+    mtime = os.path.getmtime(path)
+    siblings = {
+        encoding: path + suffix for encoding, suffix in (("br", ".br"), ("gzip", ".gz"))
+        if os.path.isfile(path + suffix) and os.path.getmtime(path + suffix) >= mtime
+    }
+    encoding = accepted_encoding(siblings)
+    mimetype = mimetypes.guess_type(source)[0] or "application/octet-stream"
+    response = send_file(siblings.get(encoding, path), mimetype=mimetype, conditional=True,
+                         max_age=current_app.config["ASSET_MAX_AGE"] if current else None)
+    if current:
+        response.cache_control.immutable = True
+    if siblings:
+        response.vary.add("Accept-Encoding")
+    if encoding:
+        response.content_encoding = encoding
+    return response
+
+
+def compress_body(data, encoding, level):
+    if encoding == "br":
+        return get_brotli().compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+@bp.after_app_request
+def compress_response(response):
+    """Compress buffered HTML/JSON/text responses above COMPRESS_MIN_BYTES.
+
+    Streamed responses (exports, label sheets, the event stream) and files
+    are left alone; /assets/ files are precompressed instead.
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < current_app.config["COMPRESS_MIN_BYTES"]:
+        return response
+    encoding = accepted_encoding({"br", "gzip"} if get_brotli() else {"gzip"})
+    if encoding is None:
+        return response
+    response.set_data(compress_body(data, encoding, current_app.config["COMPRESS_LEVEL"]))
+    response.content_encoding = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # The compressed body is a different representation of the same resource
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
+
+
+def write_file_atomically(path, data):
+    # Workers starting together may build the same file; readers never see half of one
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build_static_assets(static_folder, stale_only=False):
+    """Write .gz (and .br where brotli is installed) next to each compressible static file.
+
+    With stale_only, files whose compressed siblings are newer than the
+    source are skipped. Returns (path, original bytes, gzip bytes, brotli
+    bytes or None) per file written.
+    """
+    brotli = get_brotli()
+    suffixes = (".gz", ".br") if brotli is not None else (".gz",)
+    built = []
+    for root, dirs, files in os.walk(static_folder):
+        for name in sorted(files):
+            if not name.endswith(ASSET_PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            mtime = os.path.getmtime(path)
+            if stale_only and all(os.path.isfile(path + suffix) and os.path.getmtime(path + suffix) >= mtime
+                                  for suffix in suffixes):
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+            write_file_atomically(path + ".gz", gzipped)
+            brotlied = None
+            if brotli is not None:
+                brotlied = brotli.compress(data, quality=11)
+                write_file_atomically(path + ".br", brotlied)
+            built.append((os.path.relpath(path, static_folder), len(data), len(gzipped),
+                          len(brotlied) if brotlied is not None else None))
+    return built
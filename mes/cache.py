@@ -0,0 +1,112 @@
+"""Aggregate cache shared by the workers on a host, keyed on the data version."""
+from flask import current_app
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import os
+import time
+import json
+import sqlite3
+from contextlib import closing
+
+from mes.extensions import db
+from mes.models import DataVersion
+
+
+def bump_data_version():
+    """Invalidate cached aggregates when the caller's transaction commits."""
+    stmt = sqlite_insert(DataVersion).values(id=1, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DataVersion.id],
+        set_={"version": DataVersion.version + 1}
+    )
+    db.session.execute(stmt)
+
+
+def get_data_version():
+    return db.session.query(DataVersion.version).filter(DataVersion.id == 1).scalar() or 0
+
+
+class SQLiteCache:
+    """JSON value cache in a local SQLite file, shared by every worker process.
+
+    Entries expire after a TTL, and the oldest entries are evicted once the
+    cache holds more than max_entries. Hit/miss counters are per process.
+    """
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._ready:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_created ON cache (created)")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def get(self, key):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, expires) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now + self.ttl)
+            )
+            conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY created DESC "
+                "LIMIT -1 OFFSET ?)", (self.max_entries,)
+            )
+
+    def stats(self):
+        with closing(self._connect()) as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "pid": os.getpid(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "entries": entries,
+        }
+
+
+def get_aggregate_cache():
+    return current_app.extensions["aggregate_cache"]
+
+
+def cached_aggregate(name, compute):
+    """Return compute() through the shared cache, keyed on the current data version.
+
+    The version is read in the request's transaction, so a value cached under
+    it was computed from data no older than that version; any later write bumps
+    the version and the old entry is never served again.
+    """
+    key = f"{name}:{get_data_version()}"
+    cache = get_aggregate_cache()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value)
+    return value
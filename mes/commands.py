@@ -0,0 +1,123 @@
+"""Flask CLI commands, e.g. `flask db-upgrade`."""
+from flask import Blueprint, current_app
+import click
+
+from mes.assets import build_static_assets, get_brotli
+from mes.extensions import db
+from mes.migrations import MIGRATIONS, check_query_plans, get_schema_version, migrate_database
+from mes.services.archive import archive_completed_orders
+from mes.services.geometry import rebuild_tool_geometry
+from mes.services.history import seed_workorder_events
+from mes.services.importer import import_workorders, iter_import_rows
+from mes.services.operator_stats import rebuild_operator_daily_stats
+from mes.services.search import ensure_search_index
+from mes.services.users import seed_users
+
+# cli_group=None keeps the commands at the top level, e.g. `flask db-upgrade`.
+bp = Blueprint("commands", __name__, cli_group=None)
+
+
+@bp.cli.command("seed-users")
+def seed_users_command():
+    """Create the predefined shop-floor accounts that do not exist yet."""
+    if get_schema_version() < MIGRATIONS[-1][0]:
+        print("Database schema is out of date; run 'flask db-upgrade' first.")
+        raise SystemExit(1)
+    count = seed_users()
+    print(f"Created {count} users.")
+
+
+@bp.cli.command("db-upgrade")
+def db_upgrade_command():
+    """Create missing tables and apply pending schema migrations."""
+    applied = migrate_database()
+    for version, description in applied:
+        print(f"Applied migration {version}: {description}")
+    print(f"Database is at schema version {get_schema_version()}.")
+
+
+@bp.cli.command("check-query-plans")
+def check_query_plans_command():
+    """Fail if any hot query has regressed to a full table scan."""
+    if get_schema_version() < MIGRATIONS[-1][0]:
+        print("Database schema is out of date; run 'flask db-upgrade' first.")
+        raise SystemExit(1)
+    failures = check_query_plans()
+    for name, plan in failures:
+        print(f"FAIL {name}: {' | '.join(plan)}")
+    if failures:
+        raise SystemExit(1)
+    print("All hot queries use their indexes.")
+
+
+@bp.cli.command("build-assets")
+def build_assets_command():
+    """Precompress all static CSS/JS again; the app also does this for changed files on startup."""
+    built = build_static_assets(current_app.static_folder)
+    for path, size, gzipped, brotlied in built:
+        print(f"{path}: {size} -> gzip {gzipped}" + (f", brotli {brotlied}" if brotlied is not None else ""))
+    if get_brotli() is None:
+        print("brotli is not installed; wrote gzip only.")
+    print(f"Precompressed {len(built)} static files.")
+
+
+@bp.cli.command("import-orders")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_orders_command(path):
+    """Bulk-create work orders from a CSV or XLSX file."""
+    with open(path, "rb") as f:
+        try:
+            report = import_workorders(iter_import_rows(f, path))
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    errors = [r for r in report if r["status"] == "error"]
+    for r in errors:
+        print(f"Row {r['row']} ({r['work_order_no']}): {r['message']}")
+    print(f"Created {len(report) - len(errors)} work orders, {len(errors)} errors.")
+
+
+@bp.cli.command("archive-orders")
+@click.option("--days", type=int, default=None,
+              help="Archive orders completed more than this many days ago (default ARCHIVE_AFTER_DAYS).")
+def archive_orders_command(days):
+    """Move old completed orders and their history out of the hot tables.
+
+    Meant to run from cron or another scheduler, e.g. nightly.
+    """
+    days = current_app.config["ARCHIVE_AFTER_DAYS"] if days is None else days
+    try:
+        count = archive_completed_orders(days)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--days")
+    print(f"Archived {count} work orders completed more than {days} days ago.")
+
+
+@bp.cli.command("rebuild-tool-geometry")
+def rebuild_tool_geometry_command():
+    """Re-bucket orders by GEOMETRY_TOLERANCE_MM and recompute the geometry rollup."""
+    count = rebuild_tool_geometry()
+    print(f"Grouped work orders into {count} tool geometries.")
+
+
+@bp.cli.command("backfill-operator-stats")
+def backfill_operator_stats_command():
+    """Rebuild the OperatorDailyStats rollup from the order event log."""
+    db.create_all()
+    count = rebuild_operator_daily_stats()
+    print(f"Rebuilt {count} operator daily stats rows.")
+
+
+@bp.cli.command("seed-order-events")
+def seed_order_events_command():
+    """Seed WorkOrderEvent history for orders created before the event log existed."""
+    db.create_all()
+    count = seed_workorder_events()
+    print(f"Seeded {count} work order events.")
+
+
+@bp.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Create the live and archived work order full-text indexes and repopulate them."""
+    db.create_all()
+    ensure_search_index(rebuild=True)
+    print("Rebuilt work order search indexes.")
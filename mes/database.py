@@ -0,0 +1,74 @@
+"""SQLite connection settings, transaction begin mode and conflict retries."""
+from flask import request, abort, has_request_context, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm.exc import StaleDataError
+import time
+import random
+import sqlite3
+from functools import wraps
+
+from mes.extensions import db
+
+
+def configure_sqlite_engine(engine, config):
+    """Apply the SQLite pragmas from an app's config to every new connection of its engine."""
+    @event.listens_for(engine, "connect")
+    def configure_sqlite_connection(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        # Let SQLAlchemy emit BEGIN itself so reads and the writes that follow share one snapshot
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        if config["SQLITE_WAL"]:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+        cursor.execute(f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+@event.listens_for(Engine, "begin")
+def begin_sqlite_transaction(conn):
+    if conn.dialect.name != "sqlite":
+        return
+    # POSTs are the write paths: take the write lock up front so contention waits on
+    # busy_timeout instead of failing when a read snapshot cannot be upgraded
+    if has_request_context() and request.method == "POST":
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conn.exec_driver_sql("BEGIN")
+
+
+def is_lock_error(error):
+    message = str(getattr(error, "orig", error)).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def retry_on_conflict(view):
+    """Re-run a view when its transaction loses a write-lock race or a version check.
+
+    A version conflict (StaleDataError) means another request changed a work
+    order after this one read it; the re-run reads the new state and decides
+    again. Waits a random, exponentially growing delay between attempts so
+    that workers that collided do not collide again in lockstep. A conflict
+    that outlasts the retries is answered with 409.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        retries = current_app.config["DB_LOCK_RETRIES"]
+        for attempt in range(retries + 1):
+            try:
+                return view(*args, **kwargs)
+            except StaleDataError:
+                db.session.rollback()
+                if attempt == retries:
+                    abort(409, "The work order was changed by another request; reload and try again.")
+            except OperationalError as e:
+                db.session.rollback()
+                if not is_lock_error(e) or attempt == retries:
+                    raise
+            time.sleep(random.uniform(0, 0.05 * 2 ** attempt))
+    return wrapper
@@ -0,0 +1,5 @@
+"""Shared Flask extension instances."""
+from flask_sqlalchemy import SQLAlchemy
+
+
+db = SQLAlchemy()
@@ -0,0 +1,46 @@
+"""Small date and query helpers shared by the services."""
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select, union_all
+
+
+def day_range(day):
+    """Return the half-open [start, end) datetimes covering a date.
+
+    Filtering on this range keeps the column bare so SQLite can use its index,
+    unlike func.date(column) == day.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+# Day-first, as entered on the shop floor; ISO dates from the date picker come first
+DUE_DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f", "%d-%m-%Y",
+                    "%d/%m/%Y", "%d.%m.%Y", "%Y/%m/%d", "%d-%b-%Y", "%d %b %Y", "%d-%m-%y", "%d/%m/%y")
+
+
+def parse_due_date(value):
+    """Return a date from a date, datetime or date string, None if empty. Raises ValueError."""
+    if isinstance(value, datetime):
+        return value.date()
+    if value is None or isinstance(value, date):
+        return value
+    value = str(value).strip()
+    if not value:
+        return None
+    for fmt in DUE_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"'{value}' is not a recognised date")
+
+
+def regroup(*selects, keys):
+    """Union grouped selects that share column labels and group again, summing the non-key columns.
+
+    Used to add the archived rollups to totals computed from the hot tables.
+    """
+    combined = union_all(*selects).subquery()
+    group = [combined.c[key] for key in keys]
+    sums = [func.sum(column).label(column.name) for column in combined.c if column.name not in keys]
+    return select(*group, *sums).group_by(*group)
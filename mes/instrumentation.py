@@ -0,0 +1,120 @@
+"""Request, SQL and template timing histograms, exposed at /metrics."""
+from flask import Blueprint, request, jsonify, has_app_context, has_request_context, current_app, Response, \
+    g, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import time
+import threading
+
+from mes.cache import get_aggregate_cache
+
+bp = Blueprint("monitoring", __name__)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per endpoint, rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, endpoint, value):
+        with self.lock:
+            counts, total, observations = self.series.get(endpoint, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.series[endpoint] = (counts, total + value, observations + 1)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for endpoint, (counts, total, observations) in sorted(self.series.items()):
+                label = endpoint.replace("\\", "\\\\").replace('"', '\\"')
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{endpoint="{label}",le="{bound:g}"}} {count}')
+                lines.append(f'{self.name}_bucket{{endpoint="{label}",le="+Inf"}} {observations}')
+                lines.append(f'{self.name}_sum{{endpoint="{label}"}} {total:.6f}')
+                lines.append(f'{self.name}_count{{endpoint="{label}"}} {observations}')
+        return "\n".join(lines)
+
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+METRICS = {
+    "request": Histogram("mes_request_duration_seconds", "Request handling time.", SECONDS_BUCKETS),
+    "sql_count": Histogram("mes_request_sql_queries", "SQL statements per request.", QUERY_BUCKETS),
+    "sql_time": Histogram("mes_request_sql_seconds", "Total SQL time per request.", SECONDS_BUCKETS),
+    "template": Histogram("mes_request_template_seconds", "Template render time per request.", SECONDS_BUCKETS),
+    "qr": Histogram("mes_qr_render_seconds", "QR label render time.", SECONDS_BUCKETS),
+}
+
+
+def current_endpoint():
+    if has_request_context():
+        # Labels drop the blueprint prefix so series names stay stable
+        return request.url_rule.endpoint.rpartition(".")[2] if request.url_rule else "not_found"
+    return "background"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if has_request_context() and "sql_count" in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+    slow_ms = current_app.config["SLOW_QUERY_MS"] if has_app_context() else None
+    if slow_ms is not None and elapsed * 1000 >= slow_ms:
+        current_app.logger.warning("Slow query (%.1f ms) in %s: %s %r",
+                           elapsed * 1000, current_endpoint(), statement, parameters)
+
+
+@before_render_template.connect
+def start_template_timer(sender, template, context, **extra):
+    g.setdefault("template_start", []).append(time.perf_counter())
+
+
+@template_rendered.connect
+def stop_template_timer(sender, template, context, **extra):
+    if g.get("template_start"):
+        g.template_time = g.get("template_time", 0.0) + time.perf_counter() - g.template_start.pop()
+
+
+@bp.before_app_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.template_time = 0.0
+
+
+@bp.after_app_request
+def record_request_metrics(response):
+    if "request_start" in g:
+        endpoint = current_endpoint()
+        METRICS["request"].observe(endpoint, time.perf_counter() - g.request_start)
+        METRICS["sql_count"].observe(endpoint, g.sql_count)
+        METRICS["sql_time"].observe(endpoint, g.sql_time)
+        METRICS["template"].observe(endpoint, g.template_time)
+    return response
+
+
+@bp.route("/cache_stats")
+def cache_stats():
+    return jsonify(get_aggregate_cache().stats())
+
+
+@bp.route("/metrics")
+def metrics():
+    # Per-process, like prometheus_client without multiprocess mode
+    body = "\n".join(histogram.render() for histogram in METRICS.values()) + "\n"
+    return Response(body, mimetype="text/plain; version=0.0.4")
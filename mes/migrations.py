@@ -0,0 +1,233 @@
+"""Schema migrations and the query plan checks that guard the hot indexes."""
+from datetime import datetime, timedelta
+from sqlalchemy import select, text, literal
+from sqlalchemy.schema import CreateIndex
+
+from mes.extensions import db
+from mes.helpers import day_range, parse_due_date
+from mes.models import ArchivedWorkOrder, ArchivedWorkOrderEvent, DISPATCH_OPEN, DISPATCH_PRIORITY, \
+    OperatorDailyStats, RejectionLog, ScanIdempotencyKey, ToolGeometry, WorkOrder, WorkOrderEvent
+from mes.services.geometry import rebuild_tool_geometry
+from mes.services.history import seed_workorder_events
+from mes.services.operator_stats import rebuild_operator_daily_stats
+from mes.services.search import ensure_search_index
+
+
+# Each migration runs once, in order, and the applied version is stored in
+# SQLite's PRAGMA user_version. Append new steps; never edit applied ones.
+def add_missing_columns(model, *names):
+    """ALTER TABLE ADD COLUMN for model columns an older database lacks."""
+    table = model.__table__
+    existing = {row[1] for row in db.session.execute(text(f"PRAGMA table_info({table.name})"))}
+    for name in names:
+        if name not in existing:
+            column = table.c[name]
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+
+
+def create_missing_indexes(*names):
+    # Each step names its own indexes: the models may also declare indexes on
+    # columns that only a later step adds. IF NOT EXISTS rather than
+    # checkfirst, because SQLAlchemy cannot reflect expression indexes.
+    indexes = {index.name: index for table in db.metadata.tables.values() for index in table.indexes}
+    for name in names:
+        db.session.execute(CreateIndex(indexes[name], if_not_exists=True))
+
+
+def _migrate_hot_indexes():
+    create_missing_indexes(
+        "ix_work_order_operator_status", "ix_work_order_status", "ix_work_order_end_time",
+        "ix_rejection_log_operator_timestamp", "ix_rejection_log_work_order_id",
+        "ix_rejection_log_timestamp",
+    )
+
+
+def _migrate_search_index():
+    ensure_search_index()
+
+
+def _migrate_seed_events():
+    seed_workorder_events()
+
+
+def _migrate_archive_search_index():
+    # The archive tables themselves come from create_all()
+    ensure_search_index()
+
+
+def _migrate_due_dates():
+    # SQLite stores Date columns as ISO text, so legacy VARCHAR columns only
+    # need their values rewritten; the declared type is left as it was.
+    for orders, events in ((WorkOrder, WorkOrderEvent), (ArchivedWorkOrder, ArchivedWorkOrderEvent)):
+        table = orders.__table__.name
+        raw_values = db.session.execute(text(
+            f"SELECT DISTINCT due_date FROM {table} WHERE due_date IS NOT NULL"
+        )).scalars().all()
+        for raw in raw_values:
+            try:
+                parsed = parse_due_date(raw)
+            except ValueError:
+                # Keep the unparseable text in the order's log before clearing it
+                db.session.execute(events.__table__.insert().from_select(
+                    ["work_order_id", "ts", "action", "reason"],
+                    select(orders.id, literal(datetime.utcnow(), db.DateTime),
+                           literal("Due Date Cleared"), literal(f"Unrecognised due date '{raw}'"))
+                    .where(text(f"{table}.due_date = :raw").bindparams(raw=raw))
+                ))
+                parsed = None
+            new_value = parsed.isoformat() if parsed else None
+            if new_value != raw:
+                db.session.execute(text(f"UPDATE {table} SET due_date = :new WHERE due_date = :raw"),
+                                   {"new": new_value, "raw": raw})
+    create_missing_indexes("ix_work_order_due_date", "ix_work_order_dispatch")
+
+
+def _migrate_tool_geometry():
+    add_missing_columns(WorkOrder, "geometry_id")
+    add_missing_columns(ArchivedWorkOrder, "geometry_id")
+    create_missing_indexes("ix_work_order_geometry_id")
+    rebuild_tool_geometry()
+
+
+def _migrate_order_versions():
+    add_missing_columns(WorkOrder, "version")
+    add_missing_columns(ArchivedWorkOrder, "version")
+    for model in (WorkOrder, ArchivedWorkOrder):
+        db.session.execute(model.__table__.update().where(model.version.is_(None)).values(version=1))
+
+
+def _migrate_archive_end_time_index():
+    create_missing_indexes("ix_work_order_archive_end_time")
+
+
+def _migrate_scan_key_operator():
+    # SQLite cannot change a primary key in place: rebuild the table and copy
+    # the keys over, so events still in flight are not applied twice
+    table = ScanIdempotencyKey.__table__
+    primary_key = [row[1] for row in db.session.execute(text(f"PRAGMA table_info({table.name})")) if row[5]]
+    if "operator" in primary_key:
+        return
+    db.session.execute(text(f"ALTER TABLE {table.name} RENAME TO {table.name}_old"))
+    for index in table.indexes:
+        db.session.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    table.create(db.session.connection())
+    db.session.execute(text(
+        f"INSERT INTO {table.name} (operator, key, result, created) "
+        f"SELECT COALESCE(operator, ''), key, result, created FROM {table.name}_old"
+    ))
+    db.session.execute(text(f"DROP TABLE {table.name}_old"))
+
+
+def _migrate_operator_daily_stats():
+    rebuild_operator_daily_stats()
+
+
+MIGRATIONS = [
+    (1, "work order full-text search index", _migrate_search_index),
+    (2, "seed work order event log", _migrate_seed_events),
+    (3, "indexes on hot filter columns", _migrate_hot_indexes),
+    (4, "archived work order search index", _migrate_archive_search_index),
+    (5, "due dates as ISO dates, dispatch queue index", _migrate_due_dates),
+    (6, "tool geometry dimension and rollup", _migrate_tool_geometry),
+    (7, "work order versions for optimistic concurrency", _migrate_order_versions),
+    (8, "archived order end time index for cycle time analytics", _migrate_archive_end_time_index),
+    (9, "scan idempotency keys scoped per operator", _migrate_scan_key_operator),
+    (10, "backfill operator daily stats from the event log", _migrate_operator_daily_stats),
+]
+
+
+def get_schema_version():
+    return db.session.execute(text("PRAGMA user_version")).scalar()
+
+
+def migrate_database():
+    """Create missing tables and apply pending migrations. Returns the versions applied."""
+    db.create_all()
+    current = get_schema_version()
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        step()
+        db.session.execute(text(f"PRAGMA user_version = {int(version)}"))
+        db.session.commit()
+        applied.append((version, description))
+    return applied
+
+
+# Hot queries and the index each must use. check_query_plans() fails if any of
+# them regresses to a full table scan.
+def _query_plan_checks():
+    today_start, tomorrow_start = day_range(datetime.utcnow().date())
+    week_start = today_start.date() - timedelta(days=today_start.weekday())
+    return [
+        ("operator active orders",
+         WorkOrder.query.filter(WorkOrder.current_operator == "x", WorkOrder.status == "In Progress"),
+         "ix_work_order_operator_status"),
+        ("orders ended today",
+         WorkOrder.query.filter(WorkOrder.end_time >= today_start, WorkOrder.end_time < tomorrow_start),
+         "ix_work_order_end_time"),
+        ("operator rejections",
+         RejectionLog.query.filter(RejectionLog.operator == "x").order_by(RejectionLog.timestamp),
+         "ix_rejection_log_operator_timestamp"),
+        ("order rejections",
+         RejectionLog.query.filter(RejectionLog.work_order_id == 1),
+         "ix_rejection_log_work_order_id"),
+        ("rejections today",
+         RejectionLog.query.filter(RejectionLog.timestamp >= today_start,
+                                   RejectionLog.timestamp < tomorrow_start),
+         "ix_rejection_log_timestamp"),
+        ("order events",
+         WorkOrderEvent.query.filter(WorkOrderEvent.work_order_id == 1)
+         .order_by(WorkOrderEvent.ts, WorkOrderEvent.id),
+         "ix_work_order_event_order_ts"),
+        ("archived order lookup",
+         ArchivedWorkOrder.query.filter(ArchivedWorkOrder.work_order_no == "x"),
+         "ix_work_order_archive_no"),
+        ("archived order events",
+         ArchivedWorkOrderEvent.query.filter(ArchivedWorkOrderEvent.work_order_id == 1)
+         .order_by(ArchivedWorkOrderEvent.ts, ArchivedWorkOrderEvent.id),
+         "ix_work_order_event_archive_order_ts"),
+        ("similar tools",
+         ToolGeometry.query.filter(ToolGeometry.diameter.between(5.0, 7.0)),
+         "ix_tool_geometry_dimensions"),
+        ("dispatch queue",
+         WorkOrder.query.filter(DISPATCH_OPEN, WorkOrder.due_date <= today_start.date())
+         .order_by(WorkOrder.due_date, DISPATCH_PRIORITY, WorkOrder.id),
+         "ix_work_order_dispatch"),
+        ("cycle times",
+         WorkOrder.query.filter(WorkOrder.end_time >= today_start),
+         "ix_work_order_end_time"),
+        ("archived cycle times",
+         ArchivedWorkOrder.query.filter(ArchivedWorkOrder.end_time >= today_start),
+         "ix_work_order_archive_end_time"),
+        ("operator weekly stats",
+         OperatorDailyStats.query.filter(OperatorDailyStats.operator == "x",
+                                         OperatorDailyStats.day >= week_start),
+         None),
+    ]
+
+
+def explain_query_plan(query):
+    """Return the EXPLAIN QUERY PLAN detail lines for an ORM query."""
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + str(compiled), params
+    ).all()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans():
+    """Return a list of (name, plan) for hot queries that no longer use their index."""
+    failures = []
+    for name, query, index_name in _query_plan_checks():
+        plan = explain_query_plan(query)
+        full_scan = any(line.startswith("SCAN ") and "INDEX" not in line for line in plan)
+        uses_index = any(line.startswith("SEARCH ") for line in plan) and (
+            index_name is None or any(index_name in line for line in plan)
+        )
+        if full_scan or not uses_index:
+            failures.append((name, plan))
+    return failures
@@ -0,0 +1,187 @@
+"""Database models, including the archive tables."""
+from datetime import datetime
+from sqlalchemy import literal_column
+
+from mes.extensions import db
+
+
+class ToolGeometry(db.Model):
+    # Distinct bucketed tool dimensions, with a rollup of every order made to them
+    id = db.Column(db.Integer, primary_key=True)
+    diameter = db.Column(db.Float, nullable=False)
+    flute_length = db.Column(db.Float, nullable=False)
+    overall_length = db.Column(db.Float, nullable=False)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    completed_qty = db.Column(db.Integer, nullable=False, default=0)
+    rejected_qty = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_tool_geometry_dimensions", "diameter", "flute_length", "overall_length",
+                 unique=True),
+    )
+
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), unique=True, nullable=False)
+    pin = db.Column(db.String(6), default="000000")
+    role = db.Column(db.String(20))  # operator, manager, master
+    must_change_pin = db.Column(db.Boolean, default=True)
+
+
+class WorkOrder(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    work_order_no = db.Column(db.String(50), unique=True, nullable=False)
+    client_name = db.Column(db.String(100))
+    po_number = db.Column(db.String(100))
+    part_name = db.Column(db.String(100))
+    quantity = db.Column(db.Integer, nullable=False)
+    completed_qty = db.Column(db.Integer, default=0)
+    rejected_qty = db.Column(db.Integer, default=0)
+    diameter = db.Column(db.Float)
+    flute_length = db.Column(db.Float)
+    overall_length = db.Column(db.Float)
+    due_date = db.Column(db.Date)
+    status = db.Column(db.String(20), default="Not Started")
+
+    # Operator tracking
+    current_operator = db.Column(db.String(50))
+    previous_operator = db.Column(db.String(50))
+    current_machine = db.Column(db.String(50))
+    start_time = db.Column(db.DateTime)
+    end_time = db.Column(db.DateTime)
+    last_handover_time = db.Column(db.DateTime)
+    # Add complaint field for order logs and complaints
+    complaint = db.Column(db.String(200))
+    geometry_id = db.Column(db.Integer, db.ForeignKey("tool_geometry.id"), index=True)
+    # Bumped by every update. The ORM adds "AND version = ?" to each UPDATE it
+    # flushes and raises StaleDataError when another writer got there first.
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        db.Index("ix_work_order_operator_status", "current_operator", "status"),
+        db.Index("ix_work_order_status", "status"),
+        db.Index("ix_work_order_end_time", "end_time"),
+        db.Index("ix_work_order_due_date", "due_date", "id"),
+    )
+
+
+# Dispatch queue order: earliest due date first, then the most work left. The
+# priority is negated remaining quantity so the whole index can be ascending.
+# The status test is inlined, not bound, so SQLite can match the partial index.
+DISPATCH_PRIORITY = WorkOrder.completed_qty + WorkOrder.rejected_qty - WorkOrder.quantity
+DISPATCH_OPEN = (WorkOrder.status != literal_column("'Completed'")) & WorkOrder.due_date.isnot(None)
+db.Index("ix_work_order_dispatch", WorkOrder.due_date, DISPATCH_PRIORITY, WorkOrder.id,
+         sqlite_where=DISPATCH_OPEN)
+
+
+class RejectionLog(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    work_order_id = db.Column(db.Integer, db.ForeignKey("work_order.id"))
+    operator = db.Column(db.String(50))
+    quantity = db.Column(db.Integer)
+    reason = db.Column(db.String(200))
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_rejection_log_operator_timestamp", "operator", "timestamp"),
+        db.Index("ix_rejection_log_work_order_id", "work_order_id"),
+        db.Index("ix_rejection_log_timestamp", "timestamp"),
+    )
+
+
+class WorkOrderEvent(db.Model):
+    # Append-only history of every state change on a work order
+    id = db.Column(db.Integer, primary_key=True)
+    work_order_id = db.Column(db.Integer, db.ForeignKey("work_order.id"), nullable=False)
+    ts = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    action = db.Column(db.String(30), nullable=False)
+    operator = db.Column(db.String(50))
+    machine = db.Column(db.String(50))
+    quantity = db.Column(db.Integer)
+    reason = db.Column(db.String(200))
+
+    __table_args__ = (
+        db.Index("ix_work_order_event_order_ts", "work_order_id", "ts"),
+    )
+
+
+class ScanIdempotencyKey(db.Model):
+    # Client-generated keys of scan API events already applied, with the result returned;
+    # keys are only unique per logged-in operator
+    operator = db.Column(db.String(50), primary_key=True)
+    key = db.Column(db.String(64), primary_key=True)
+    result = db.Column(db.Text, nullable=False)
+    created = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class DataVersion(db.Model):
+    # Single-row counter bumped by every order write; cached aggregates are keyed on it
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class OperatorDailyStats(db.Model):
+    # Rollup of each operator's output per day, maintained alongside order writes
+    operator = db.Column(db.String(50), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    completed_qty = db.Column(db.Integer, nullable=False, default=0)
+    rejected_qty = db.Column(db.Integer, nullable=False, default=0)
+    scans = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _history_columns(model, *skip):
+    """Copy a model's columns, without defaults, foreign keys or indexes, for its archive table."""
+    return [db.Column(column.name, column.type, primary_key=column.primary_key,
+                      nullable=column.nullable)
+            for column in model.__table__.columns if column.name not in skip]
+
+
+class ArchivedWorkOrder(db.Model):
+    # Completed orders moved out of work_order by archive_completed_orders(); ids are kept
+    __table__ = db.Table(
+        "work_order_archive", db.metadata,
+        *_history_columns(WorkOrder),
+        db.Column("archived_at", db.DateTime, nullable=False),
+        db.Index("ix_work_order_archive_no", "work_order_no"),
+        db.Index("ix_work_order_archive_end_time", "end_time"),
+    )
+
+
+class ArchivedRejectionLog(db.Model):
+    __table__ = db.Table(
+        "rejection_log_archive", db.metadata,
+        db.Column("id", db.Integer, primary_key=True),
+        *_history_columns(RejectionLog, "id"),
+        db.Index("ix_rejection_log_archive_work_order_id", "work_order_id"),
+    )
+
+
+class ArchivedWorkOrderEvent(db.Model):
+    __table__ = db.Table(
+        "work_order_event_archive", db.metadata,
+        db.Column("id", db.Integer, primary_key=True),
+        *_history_columns(WorkOrderEvent, "id"),
+        db.Index("ix_work_order_event_archive_order_ts", "work_order_id", "ts"),
+    )
+
+
+class ArchivedOrderTotals(db.Model):
+    # What archived orders contributed to the dashboard aggregates, one row per group per archive run
+    id = db.Column(db.Integer, primary_key=True)
+    operator = db.Column(db.String(50))
+    diameter = db.Column(db.Float)
+    flute_length = db.Column(db.Float)
+    overall_length = db.Column(db.Float)
+    orders = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    completed_qty = db.Column(db.Integer, nullable=False)
+    rejected_qty = db.Column(db.Integer, nullable=False)
+
+
+class ArchivedRejectionTotals(db.Model):
+    # Archived RejectionLog quantity by the operator who logged it, one row per operator per archive run
+    id = db.Column(db.Integer, primary_key=True)
+    operator = db.Column(db.String(50))
+    quantity = db.Column(db.Integer, nullable=False)
@@ -0,0 +1 @@
+"""Blueprints for the pages and endpoints; app.create_app() registers them."""
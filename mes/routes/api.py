@@ -0,0 +1,197 @@
+"""JSON and event-stream endpoints for scanners and dashboards."""
+from flask import Blueprint, request, session, jsonify, current_app, Response
+from datetime import datetime, timedelta
+from sqlalchemy.orm.exc import StaleDataError
+import time
+import json
+
+from mes.database import retry_on_conflict
+from mes.extensions import db
+from mes.models import ScanIdempotencyKey
+from mes.routes.helpers import get_page_size
+from mes.services.geometry import find_similar_geometries, geometry_key
+from mes.services.listing import dispatch_entry, dispatch_queue, parse_until
+from mes.services.live import SSE_BUSY_RETRY_SECONDS, SSE_HEARTBEAT, SSE_MAX_STREAM_SECONDS, order_events, \
+    order_number_index
+from mes.services.orders import SCAN_BATCH_MAX_EVENTS, SCAN_KEY_RETENTION_DAYS, TransitionError, \
+    apply_scan_event, parse_event_time
+from mes.services.qr import queue_qr_label
+
+bp = Blueprint("api", __name__)
+
+
+@bp.route("/api/similar_tools")
+def api_similar_tools():
+    """Geometries near the given dimensions, with their order history, for the create form."""
+    if "username" not in session:
+        return jsonify({"error": "login_required"}), 401
+    try:
+        dimensions = [float(request.args[name]) for name in ("diameter", "flute_length", "overall_length")]
+    except (KeyError, ValueError):
+        return jsonify({"error": "dimensions_required"}), 400
+    key = geometry_key(*dimensions)
+    tools = []
+    for geometry in find_similar_geometries(*dimensions):
+        made = geometry.completed_qty + geometry.rejected_qty
+        tools.append({
+            "diameter": geometry.diameter,
+            "flute_length": geometry.flute_length,
+            "overall_length": geometry.overall_length,
+            "exact": (geometry.diameter, geometry.flute_length, geometry.overall_length) == key,
+            "orders": geometry.orders,
+            "completed_qty": geometry.completed_qty,
+            "rejected_qty": geometry.rejected_qty,
+            "rejection_rate": round(geometry.rejected_qty / made * 100, 1) if made else 0,
+        })
+    return jsonify({"tools": tools})
+
+
+@bp.route("/api/dispatch")
+def api_dispatch():
+    """Open orders by due date, most work left first, one keyset page at a time.
+
+    Query: until (ISO date, "late" or "today"), per_page, after (cursor).
+    """
+    if session.get("role") not in ("manager", "master"):
+        return jsonify({"error": "login_required"}), 401
+    orders, next_cursor = dispatch_queue(
+        until=parse_until(request.args.get("until", "").strip()),
+        after=request.args.get("after"),
+        per_page=get_page_size()
+    )
+    today = datetime.utcnow().date()
+    return jsonify({
+        "orders": [dispatch_entry(order, today) for order in orders],
+        "next_cursor": next_cursor,
+    })
+
+
+@bp.route("/api/work_order_suggestions")
+def api_work_order_suggestions():
+    """Open work order numbers starting with ?q=, for typing a number on the scan page.
+
+    Answered from the in-memory index; only the first call in a worker reads the database.
+    """
+    if "username" not in session:
+        return jsonify({"error": "login_required"}), 401
+    prefix = request.args.get("q", "").strip()
+    if not prefix:
+        return jsonify({"suggestions": []})
+    suggestions = order_number_index.suggest(prefix)
+    if not suggestions and prefix != prefix.upper():
+        suggestions = order_number_index.suggest(prefix.upper())
+    return jsonify({"suggestions": suggestions})
+
+
+@bp.route("/api/scans", methods=["POST"])
+@retry_on_conflict
+def api_scan_batch():
+    """Apply a batch of queued scanner events in one transaction.
+
+    Body: {"events": [{"key", "type": "scan"|"finish", "ts", "work_order_no",
+    "machine", "operator", "action", "quantity", "reason", "complaint",
+    "version"}, ...]}. A finish with a version is refused with "conflict"
+    if the order has changed since the scanner read that version.
+    Events are applied in timestamp order and results come back in request
+    order. An event whose key was already applied, earlier or in this batch,
+    is not applied again; its original result is returned with
+    "duplicate": true. Keys are scoped to the logged-in operator.
+    """
+    if "username" not in session:
+        return jsonify({"error": "login_required"}), 401
+    payload = request.get_json(silent=True) or {}
+    items = payload.get("events")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "no_events"}), 400
+    if len(items) > SCAN_BATCH_MAX_EVENTS:
+        return jsonify({"error": "too_many_events", "max": SCAN_BATCH_MAX_EVENTS}), 400
+    if any(not isinstance(item, dict) or not item.get("key") for item in items):
+        return jsonify({"error": "missing_key"}), 400
+
+    username = session["username"]
+    role = session.get("role", "operator")
+    keys = [str(item["key"])[:64] for item in items]
+    seen = {row.key: json.loads(row.result) for row in
+            ScanIdempotencyKey.query.filter(ScanIdempotencyKey.operator == username,
+                                            ScanIdempotencyKey.key.in_(keys))}
+
+    results = [None] * len(items)
+    rework_orders = []
+    def event_order(index):
+        try:
+            return parse_event_time(items[index].get("ts"))
+        except ValueError:
+            return datetime.utcnow()
+
+    # sorted() is stable, so repeats of a key with the same ts keep request order
+    for index in sorted(range(len(items)), key=event_order):
+        key, item = keys[index], items[index]
+        if key in seen:
+            results[index] = dict(seen[key], key=key, duplicate=True)
+            continue
+        savepoint = db.session.begin_nested()
+        try:
+            result = apply_scan_event(item, username, role)
+            savepoint.commit()
+        except TransitionError as e:
+            savepoint.rollback()
+            result = {"ok": False, "error": e.code}
+        except StaleDataError:
+            # Another writer changed an order mid-batch; retry_on_conflict re-runs the
+            # whole batch, which is safe because no idempotency key is committed yet
+            savepoint.rollback()
+            raise
+        except Exception:
+            savepoint.rollback()
+            current_app.logger.exception("Scan API event %s failed", key)
+            result = {"ok": False, "error": "internal"}
+        if result.get("rework_order"):
+            rework_orders.append(result["rework_order"])
+        db.session.add(ScanIdempotencyKey(key=key, operator=username, result=json.dumps(result)))
+        seen[key] = result
+        results[index] = dict(result, key=key)
+
+    ScanIdempotencyKey.query.filter(
+        ScanIdempotencyKey.created < datetime.utcnow() - timedelta(days=SCAN_KEY_RETENTION_DAYS)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    for order_no in rework_orders:
+        queue_qr_label(order_no)
+
+    return jsonify({"results": results})
+
+
+@bp.route("/events/orders")
+def order_event_stream():
+    if "username" not in session:
+        return "Login required", 401
+    order_events.start()
+    if not order_events.open_stream(current_app.config["SSE_MAX_STREAMS"]):
+        # Every stream slot is taken; the dashboard keeps working and retries later
+        return Response(f"retry: {SSE_BUSY_RETRY_SECONDS * 1000}\n\n", status=503,
+                        mimetype="text/event-stream",
+                        headers={"Retry-After": str(SSE_BUSY_RETRY_SECONDS)})
+    last_id = request.headers.get("Last-Event-ID", type=int)
+    if last_id is None:
+        last_id = order_events.last_id
+
+    def stream(last_id):
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        yield "retry: 2000\n\n"
+        while time.monotonic() < deadline:
+            events = order_events.wait_for(last_id, SSE_HEARTBEAT)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for event_id, payload in events:
+                yield f"id: {event_id}\ndata: {json.dumps(payload)}\n\n"
+                last_id = event_id
+
+    response = Response(stream(last_id), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    # The server closes the response when the stream ends or the client goes away,
+    # even if the generator never started
+    response.call_on_close(order_events.close_stream)
+    return response
@@ -0,0 +1,63 @@
+"""Login and PIN changes."""
+from flask import Blueprint, render_template, request, redirect, url_for, session
+
+from mes.extensions import db
+from mes.models import User
+
+bp = Blueprint("auth", __name__)
+
+
+@bp.route("/")
+def home():
+    return redirect(url_for("auth.login"))
+
+
+# ---------- LOGIN ----------
+@bp.route("/login", methods=["GET", "POST"])
+def login():
+    if request.method == "POST":
+        username = request.form.get("username", "").strip()
+        pin = request.form.get("pin", "").strip()
+
+        if not pin.isdigit() or len(pin) != 6:
+            return render_template("login.html", message="PIN must be exactly 6 digits.")
+
+        user = User.query.filter_by(username=username, pin=pin).first()
+
+        if user:
+            session["username"] = user.username
+            session["role"] = user.role
+            if user.must_change_pin:
+                return redirect(url_for("auth.set_pin"))
+            if user.role == "master":
+                return redirect(url_for("manager.manager_dashboard", username=user.username))
+            elif user.role == "manager":
+                return redirect(url_for("manager.manager_dashboard", username=user.username))
+            else:
+                return redirect(url_for("shopfloor.operator_dashboard", username=user.username))
+        else:
+            return render_template("login.html", message="Invalid username or PIN")
+
+    return render_template("login.html")
+
+
+@bp.route("/set_pin", methods=["GET", "POST"])
+def set_pin():
+    if "username" not in session:
+        return redirect(url_for("auth.login"))
+
+    message = ""
+    if request.method == "POST":
+        new_pin = request.form.get("pin", "").strip()
+
+        if new_pin and new_pin.isdigit() and len(new_pin) == 6:
+            user = User.query.filter_by(username=session["username"]).first()
+            if user:
+                user.pin = new_pin
+                user.must_change_pin = False
+                db.session.commit()
+                return redirect(url_for("auth.login"))
+        else:
+            message = "PIN must be exactly 6 digits and numeric!"
+
+    return render_template("set_pin.html", message=message)
@@ -0,0 +1,21 @@
+"""Request helpers shared by the route modules."""
+from flask import render_template, request, make_response
+
+from mes.services.listing import WORKORDER_MAX_PAGE_SIZE, WORKORDER_PAGE_SIZE
+
+
+def get_page_size():
+    try:
+        per_page = int(request.args.get("per_page", WORKORDER_PAGE_SIZE))
+    except ValueError:
+        per_page = WORKORDER_PAGE_SIZE
+    return max(1, min(per_page, WORKORDER_MAX_PAGE_SIZE))
+
+
+def render_workorder_page(template, fragment_template, orders, next_cursor, **context):
+    """Render a full listing page, or only its rows when the client asks for the next page."""
+    if request.args.get("fragment"):
+        response = make_response(render_template(fragment_template, orders=orders))
+        response.headers["X-Next-Cursor"] = next_cursor or ""
+        return response
+    return render_template(template, orders=orders, next_cursor=next_cursor, **context)
@@ -0,0 +1,86 @@
+"""QR label images and printable label sheets."""
+from flask import Blueprint, render_template, request, redirect, url_for, session, jsonify, abort, Response
+from datetime import date, datetime
+
+from mes.extensions import db
+from mes.models import WorkOrder
+from mes.services.label_sheets import LABEL_SHEET_LAYOUTS, LABEL_SHEET_MAX_LABELS, label_sheet_orders, \
+    label_tiles, stream_label_pdf
+from mes.services.qr import QR_CACHE_MAX_AGE, qr_cache, qr_label_bytes, qr_label_status
+
+bp = Blueprint("labels", __name__)
+
+
+@bp.route("/qrcodes")
+def view_qrcodes():
+    # Labels are served per order from /qr/<order>.png; the order list is the index
+    return redirect(url_for("manager.view_workorders"))
+
+
+@bp.route("/qr/<order_no>.png")
+def qr_label(order_no):
+    if qr_cache.get(order_no) is None and \
+            not WorkOrder.query.filter_by(work_order_no=order_no).first():
+        abort(404)
+    data, etag = qr_label_bytes(order_no)
+    response = Response(data, mimetype="image/png")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = QR_CACHE_MAX_AGE
+    return response.make_conditional(request)
+
+
+@bp.route("/qr_status/<path:order_no>")
+def qr_status(order_no):
+    status = qr_label_status(order_no)
+    return jsonify({
+        "status": status,
+        "url": url_for("labels.qr_label", order_no=order_no) if status == "ready" else None,
+    })
+
+
+@bp.route("/label_sheets")
+def label_sheets():
+    if session.get("role") not in ("manager", "master"):
+        return redirect(url_for("auth.login"))
+    clients = [name for (name,) in db.session.query(WorkOrder.client_name).distinct()
+               .filter(WorkOrder.client_name.isnot(None)).order_by(WorkOrder.client_name)]
+    return render_template("label_sheets.html", layouts=list(LABEL_SHEET_LAYOUTS), clients=clients,
+                           status=request.args.get("status", ""),
+                           max_labels=LABEL_SHEET_MAX_LABELS)
+
+
+@bp.route("/label_sheets.pdf")
+def label_sheet_pdf():
+    """Stream label sheets as a PDF.
+
+    Query: orders (work order numbers separated by commas, spaces or new
+    lines), or the filters status, due_from, due_to (ISO dates, inclusive)
+    and client; layout picks the label stock.
+    """
+    if session.get("role") not in ("manager", "master"):
+        return redirect(url_for("auth.login"))
+    layout = request.args.get("layout") or next(iter(LABEL_SHEET_LAYOUTS))
+    if layout not in LABEL_SHEET_LAYOUTS:
+        return "Unknown label layout", 400
+    try:
+        due_from, due_to = (date.fromisoformat(request.args[name]) if request.args.get(name) else None
+                            for name in ("due_from", "due_to"))
+    except ValueError:
+        return "Dates must be YYYY-MM-DD", 400
+
+    numbers = request.args.get("orders", "").replace(",", " ").split()
+    order_numbers = label_sheet_orders(
+        numbers=numbers, status=request.args.get("status", "").strip() or None,
+        due_from=due_from, due_to=due_to, client=request.args.get("client", "").strip() or None
+    )
+    if not order_numbers:
+        return "No work orders match this selection", 404
+
+    filename = f"labels-{datetime.utcnow():%Y%m%d-%H%M}.pdf"
+    return Response(stream_label_pdf(label_tiles(order_numbers), layout),
+                    mimetype="application/pdf", headers={
+                        "Content-Disposition": f'inline; filename="{filename}"',
+                        "X-Label-Count": str(len(order_numbers)),
+                        "X-Accel-Buffering": "no",
+                    })
@@ -0,0 +1,177 @@
+"""Manager pages: order entry, order lists, dispatch, search and the dashboard."""
+from flask import Blueprint, render_template, request, redirect, url_for, session
+from datetime import datetime
+
+from mes.database import retry_on_conflict
+from mes.extensions import db
+from mes.helpers import parse_due_date
+from mes.models import WorkOrder
+from mes.routes.helpers import get_page_size, render_workorder_page
+from mes.services.archive import find_order
+from mes.services.geometry import assign_tool_geometry
+from mes.services.history import get_order_logs, log_order_event
+from mes.services.importer import IMPORT_FIELDS, import_workorders, iter_import_rows
+from mes.services.listing import count_unscheduled_orders, dispatch_entry, dispatch_queue, \
+    paginate_workorders, parse_until
+from mes.services.qr import queue_qr_label
+from mes.services.search import search_workorders_ranked
+
+bp = Blueprint("manager", __name__)
+
+
+# ---------- MANAGER / MASTER ----------
+@bp.route("/create_order", methods=["GET", "POST"])
+@retry_on_conflict
+def create_order():
+    qr_path = None
+    qr_status_url = None
+    message = ""
+    if request.method == "POST":
+        work_order_no = request.form["work_order_no"]
+
+        existing_order = find_order(work_order_no)
+        if existing_order:
+            message = f"⚠️ Work Order {work_order_no} already exists!"
+            return render_template("create_order.html", message=message)
+        try:
+            due_date = parse_due_date(request.form.get("due_date"))
+        except ValueError as e:
+            return render_template("create_order.html", message=f"⚠️ Due date {e}.")
+
+        order = WorkOrder(
+            work_order_no=work_order_no,
+            client_name=request.form["client_name"],
+            po_number=request.form["po_number"],
+            part_name=request.form["part_name"],
+            quantity=int(request.form["quantity"]),
+            diameter=float(request.form["diameter"]),
+            flute_length=float(request.form["flute_length"]),
+            overall_length=float(request.form["overall_length"]),
+            due_date=due_date,
+            status="Not Started"
+        )
+        assign_tool_geometry([order])
+        db.session.add(order)
+        log_order_event(order, "Created", operator=session.get("username"))
+        db.session.commit()
+
+        qr_path = url_for("labels.qr_label", order_no=order.work_order_no)
+        if queue_qr_label(order.work_order_no) is not None:
+            qr_status_url = url_for("labels.qr_status", order_no=order.work_order_no)
+        message = f"✅ Work Order {order.work_order_no} created successfully!"
+
+    return render_template("create_order.html", message=message, qr_path=qr_path,
+                           qr_status_url=qr_status_url)
+
+
+@bp.route("/import_orders", methods=["GET", "POST"])
+def import_orders():
+    if session.get("role") not in ("manager", "master"):
+        return redirect(url_for("auth.login"))
+
+    message = ""
+    report = []
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            message = "❌ Choose a CSV or Excel file to import."
+        else:
+            try:
+                report = import_workorders(
+                    iter_import_rows(upload.stream, upload.filename),
+                    created_by=session.get("username")
+                )
+            except ValueError as e:
+                message = f"❌ {e}"
+            else:
+                created = sum(1 for r in report if r["status"] == "created")
+                message = f"✅ Imported {created} of {len(report)} work orders."
+
+    return render_template("import_orders.html", message=message, report=report,
+                           fields=IMPORT_FIELDS)
+
+
+@bp.route("/workorders")
+def view_workorders():
+    status = request.args.get("status", "").strip() or None
+    sort = request.args.get("sort", "id")
+    per_page = get_page_size()
+    orders, next_cursor = paginate_workorders(
+        status=status, sort=sort, after=request.args.get("after"), per_page=per_page
+    )
+    return render_workorder_page(
+        "workorders.html", "_workorder_rows.html", orders, next_cursor,
+        status=status or "", sort=sort, per_page=per_page
+    )
+
+
+@bp.route("/dispatch")
+def dispatch():
+    if session.get("role") not in ("manager", "master"):
+        return redirect(url_for("auth.login"))
+    until_arg = request.args.get("until", "").strip()
+    per_page = get_page_size()
+    orders, next_cursor = dispatch_queue(
+        until=parse_until(until_arg), after=request.args.get("after"), per_page=per_page
+    )
+    today = datetime.utcnow().date()
+    entries = [dispatch_entry(order, today) for order in orders]
+    if request.args.get("fragment"):
+        return render_workorder_page("dispatch.html", "_dispatch_rows.html", entries, next_cursor)
+    return render_workorder_page(
+        "dispatch.html", "_dispatch_rows.html", entries, next_cursor,
+        until=until_arg, per_page=per_page, unscheduled=count_unscheduled_orders()
+    )
+
+
+@bp.route("/search_workorders")
+def search_workorders():
+    query = request.args.get("q", "").strip()
+    try:
+        page = max(1, int(request.args.get("page", 1)))
+    except ValueError:
+        page = 1
+    results = []
+    has_next = False
+    if query:
+        results, has_next = search_workorders_ranked(query, page=page)
+    return render_template("search_results.html", results=results, query=query,
+                           page=page, has_next=has_next)
+
+
+@bp.route("/manager_dashboard/<username>")
+def manager_dashboard(username):
+    if "username" not in session or session["username"] != username:
+        return redirect(url_for("auth.login"))
+
+    # One page of active orders (not completed yet); later pages are fetched on demand
+    per_page = get_page_size()
+    active_orders, next_cursor = paginate_workorders(
+        status="active", after=request.args.get("after"), per_page=per_page
+    )
+    if request.args.get("fragment"):
+        return render_workorder_page(
+            "manager_dashboard.html", "_active_order_rows.html", active_orders, next_cursor
+        )
+
+    # Operator and geometry statistics live on /operator_efficiency, which caches them
+    return render_template(
+        "manager_dashboard.html",
+        username=username,
+        active_orders=active_orders,
+        next_cursor=next_cursor,
+        per_page=per_page
+    )
+
+
+@bp.route("/order_log", methods=["GET", "POST"])
+def order_log():
+    logs = []
+    order = None
+    work_order_no = ""
+    if request.method == "POST":
+        work_order_no = request.form.get("work_order_no", "").strip()
+        order = find_order(work_order_no)
+        if order:
+            logs = get_order_logs(order)
+    return render_template("order_log.html", logs=logs, order=order, work_order_no=work_order_no)
@@ -0,0 +1,66 @@
+"""Operator efficiency and data exports."""
+from flask import Blueprint, render_template, request, redirect, url_for, session, abort, current_app, \
+    Response, stream_with_context
+from datetime import date, datetime
+
+from mes.cache import cached_aggregate
+from mes.extensions import db
+from mes.models import User
+from mes.services.analytics import CYCLE_TIME_WINDOWS, get_cycle_time_analytics, get_operator_efficiency
+from mes.services.exports import EXPORTS, EXPORT_FORMATS, export_rows, stream_csv, stream_xlsx
+
+bp = Blueprint("reports", __name__)
+
+
+@bp.route('/operator_efficiency')
+def operator_efficiency():
+    days = request.args.get("days", type=int)
+    if days not in CYCLE_TIME_WINDOWS:
+        days = current_app.config["CYCLE_TIME_WINDOW_DAYS"]
+
+    def compute():
+        cycle_times = get_cycle_time_analytics(days)
+        return {"operators": get_operator_efficiency(cycle_times), "cycle_times": cycle_times}
+    # Today's figures and the cycle time window move at midnight even when no order changes
+    data = cached_aggregate(f"operator_efficiency:{days}:{datetime.utcnow().date()}", compute)
+    return render_template('operator_efficiency.html', operator_efficiency=data["operators"],
+                           cycle_times=data["cycle_times"], windows=CYCLE_TIME_WINDOWS)
+
+
+@bp.route("/export")
+def export_data():
+    if session.get("role") not in ("manager", "master"):
+        return redirect(url_for("auth.login"))
+    operators = [username for (username,) in db.session.query(User.username)
+                 .filter(User.role == "operator").order_by(User.username)]
+    return render_template("export.html", exports=list(EXPORTS), formats=EXPORT_FORMATS,
+                           operators=operators)
+
+
+@bp.route("/export/<kind>.<fmt>")
+def export_download(kind, fmt):
+    """Stream an export. Query: from, to (ISO dates, inclusive), operator, status."""
+    if session.get("role") not in ("manager", "master"):
+        return redirect(url_for("auth.login"))
+    if kind not in EXPORTS or fmt not in EXPORT_FORMATS:
+        abort(404)
+    try:
+        start, end = (date.fromisoformat(request.args[name]) if request.args.get(name) else None
+                      for name in ("from", "to"))
+    except ValueError:
+        return "Dates must be YYYY-MM-DD", 400
+
+    rows = export_rows(kind, start=start, end=end,
+                       operator=request.args.get("operator", "").strip() or None,
+                       status=request.args.get("status", "").strip() or None)
+    header = EXPORTS[kind]["columns"] + ["archived"]
+    if fmt == "csv":
+        body, mimetype = stream_csv(header, rows), "text/csv"
+    else:
+        body = stream_xlsx(kind, header, rows)
+        mimetype = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    filename = f"{kind}-{datetime.utcnow():%Y%m%d-%H%M}.{fmt}"
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Accel-Buffering": "no",
+    })
@@ -0,0 +1,121 @@
+"""Operator pages: scanning, finishing and the operator dashboard."""
+from flask import Blueprint, render_template, request, redirect, url_for, session
+
+from mes.database import retry_on_conflict
+from mes.extensions import db
+from mes.models import RejectionLog, WorkOrder
+from mes.services.history import get_order_logs
+from mes.services.operator_stats import get_operator_stats
+from mes.services.orders import TransitionError, apply_finish, apply_scan, validate_finish
+from mes.services.qr import queue_qr_label
+
+bp = Blueprint("shopfloor", __name__)
+
+
+# ---------- OPERATOR ----------
+@bp.route("/scan", methods=["GET", "POST"])
+@retry_on_conflict
+def scan_order():
+    message = ""
+    order = None
+    if request.method == "POST":
+        work_order_no = request.form["work_order_no"]
+        username = request.form["username"]
+        machine = request.form["machine"]
+
+        order = WorkOrder.query.filter_by(work_order_no=work_order_no).first()
+        if not order:
+            message = f"❌ Work Order {work_order_no} not found!"
+            return render_template("scan.html", message=message, order=None)
+
+        outcome = apply_scan(order, username, machine)
+        if outcome == "completed":
+            db.session.commit()
+            message = f"✅ Work Order {work_order_no} handover complete. Marked as Completed and assigned to {username}."
+            return render_template("scan.html", message=message, order=order)
+        elif outcome == "already_completed":
+            message = f"✅ Work Order {work_order_no} already completed."
+            return render_template("scan.html", message=message, order=order)
+        else:
+            db.session.commit()
+            # Redirect directly to finish_order page for this work order
+            return redirect(url_for('shopfloor.finish_order', order_no=work_order_no))
+
+    return render_template("scan.html", message=message, order=order)  
+
+
+@bp.route("/finish_order/<order_no>", methods=["GET", "POST"])
+@retry_on_conflict
+def finish_order(order_no):
+    if "username" not in session:
+        return redirect(url_for("auth.login"))
+
+    order = WorkOrder.query.filter_by(work_order_no=order_no).first()
+    if not order:
+        return "Order not found", 404
+
+    message = ""
+    status_code = 200
+    role = session.get("role", "operator")
+
+    if request.method == "POST":
+        try:
+            qty = int(request.form.get("quantity", 0))
+        except ValueError:
+            qty = 0
+
+        action = request.form["action"]
+        complaint = request.form.get("complaint", "").strip()
+        # The version the form was rendered with; a finish is refused once the order moved on
+        expected_version = request.form.get("version", type=int)
+
+        try:
+            if role in ("manager", "master") and action != "close_order":
+                validate_finish(order, action, qty, expected_version)
+                # Managers can still act like operators if needed
+                return redirect(url_for("shopfloor.finish_order", order_no=order_no))
+
+            rework_order = apply_finish(
+                order, action, qty, role, session["username"], complaint=complaint,
+                reason=request.form.get("reason", "No reason"), expected_version=expected_version
+            )
+        except TransitionError as e:
+            icon = "⚠️" if e.code in ("not_allowed", "conflict") else "❌"
+            message = f"{icon} {e.message}"
+            if e.code == "conflict":
+                status_code = 409
+        else:
+            db.session.commit()
+            if rework_order is not None:
+                queue_qr_label(rework_order.work_order_no)
+            if action == "close_order":
+                return redirect(url_for("manager.manager_dashboard", username=session["username"]))
+            return redirect(url_for("shopfloor.operator_dashboard", username=session["username"]))
+
+    logs = get_order_logs(order)
+
+    return render_template("finish_order.html", order=order, message=message, logs=logs,
+                           role=role), status_code
+
+@bp.route("/operator_dashboard/<username>")
+def operator_dashboard(username):
+    if "username" not in session or session["username"] != username:
+        return redirect(url_for("auth.login"))
+
+    # Show both "In Progress" and "Waiting for Handover" as active
+    active_orders = WorkOrder.query.filter(
+        WorkOrder.current_operator == username,
+        WorkOrder.status == "In Progress"
+    ).all()
+    completed_orders = WorkOrder.query.filter_by(current_operator=username, status="Completed").all()
+    rejections = RejectionLog.query.filter_by(operator=username).all()
+    stats = get_operator_stats(username)
+
+    return render_template(
+        "operator_dashboard.html",
+        username=username,
+        active_orders=active_orders,
+        completed_orders=completed_orders,
+        rejections=rejections,
+        stats=stats
+    )
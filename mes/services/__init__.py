@@ -0,0 +1 @@
+"""Business logic shared by the routes and the CLI commands."""
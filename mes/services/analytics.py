@@ -0,0 +1,225 @@
+"""Cycle time analytics and operator efficiency."""
+from flask import current_app
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, distinct, select, literal, union_all
+
+from mes.extensions import db
+from mes.helpers import regroup
+from mes.models import ArchivedWorkOrder, ArchivedWorkOrderEvent, OperatorDailyStats, ToolGeometry, User, \
+    WorkOrder, WorkOrderEvent
+from mes.services.history import FINISH_EVENTS
+
+
+# A cycle runs from an operator taking an order (Started or Handed Over) to
+# each quantity they finish on it, or from their previous finish on the same
+# order; it is compared per unit, so batches of different sizes line up. Each
+# tool geometry's median minutes per unit is its standard time; an operator's
+# time efficiency is the median of standard / actual over their cycles, in
+# percent. Cycles are built from the event log because a handover scan
+# overwrites the order's current_operator and end_time.
+CYCLE_TIME_MIN_SAMPLES = 3
+CYCLE_TIME_TOP_GEOMETRIES = 10
+CYCLE_START_EVENTS = ("Started", "Handed Over")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list; None when it is empty."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "orders": len(values),
+        "p50": round(percentile(values, 50), 2) if values else None,
+        "p90": round(percentile(values, 90), 2) if values else None,
+    }
+
+
+def cycle_time_columns(since):
+    """Pull cycles finished since a datetime, live and archived, as columns in one query.
+
+    Returns (operators, geometry_ids, quantities, minutes, days) tuples; days
+    counts from `since`. Each finish event with a quantity is paired with the
+    order's previous start or finish event, and only counts when both were
+    recorded by the same operator. The durations are computed by SQLite, so
+    no datetime objects are built per row.
+    """
+    since_jd = func.julianday(literal(since, db.DateTime))
+    selects = []
+    for orders, events in ((WorkOrder, WorkOrderEvent), (ArchivedWorkOrder, ArchivedWorkOrderEvent)):
+        order_by = (events.ts, events.id)
+        steps = select(
+            events.operator,
+            events.action,
+            events.quantity,
+            events.ts,
+            orders.geometry_id,
+            func.lag(events.operator).over(partition_by=events.work_order_id, order_by=order_by)
+            .label("previous_operator"),
+            func.lag(events.ts).over(partition_by=events.work_order_id, order_by=order_by)
+            .label("previous_ts"),
+        ).join(orders, orders.id == events.work_order_id).where(
+            # A handover scan overwrites end_time with a later time, so this still
+            # keeps every order with a finish in the window
+            orders.end_time >= since,
+            events.action.in_(CYCLE_START_EVENTS)
+            | (events.action.in_(FINISH_EVENTS) & events.quantity.isnot(None)),
+        ).subquery()
+        selects.append(select(
+            steps.c.operator,
+            steps.c.geometry_id,
+            steps.c.quantity,
+            (func.julianday(steps.c.ts) - func.julianday(steps.c.previous_ts)) * 1440,
+            func.julianday(steps.c.ts) - since_jd,
+        ).where(
+            steps.c.action.in_(FINISH_EVENTS),
+            steps.c.quantity > 0,
+            steps.c.operator == steps.c.previous_operator,
+            steps.c.ts > steps.c.previous_ts,
+            steps.c.ts >= since,
+        ))
+    rows = db.session.execute(union_all(*selects)).all()
+    return tuple(zip(*rows)) if rows else ((),) * 5
+
+
+def get_cycle_time_analytics(days=None, trend_days=None):
+    """Cycle time percentiles per operator, per tool geometry and per trend bucket.
+
+    Covers cycles finished in the last `days` (CYCLE_TIME_WINDOW_DAYS by
+    default), bucketed every `trend_days` (CYCLE_TIME_TREND_DAYS), each
+    credited to the operator who did the work.
+    """
+    days = days or current_app.config["CYCLE_TIME_WINDOW_DAYS"]
+    trend_days = trend_days or current_app.config["CYCLE_TIME_TREND_DAYS"]
+    since = datetime.combine(datetime.utcnow().date() - timedelta(days=days - 1), datetime.min.time())
+    operators, geometry_ids, quantities, minutes, offsets = cycle_time_columns(since)
+    per_unit = [m / q for m, q in zip(minutes, quantities)]
+
+    by_geometry = {}
+    for geometry_id, value in zip(geometry_ids, per_unit):
+        by_geometry.setdefault(geometry_id, []).append(value)
+    by_geometry.pop(None, None)
+    standards = {geometry_id: percentile(sorted(values), 50)
+                 for geometry_id, values in by_geometry.items()
+                 if len(values) >= CYCLE_TIME_MIN_SAMPLES}
+
+    by_operator = {}
+    for operator, geometry_id, value in zip(operators, geometry_ids, per_unit):
+        if operator:
+            by_operator.setdefault(operator, []).append((value, standards.get(geometry_id)))
+    operator_stats = {}
+    for operator, samples in by_operator.items():
+        stats = summarize(value for value, _ in samples)
+        ratios = sorted(standard / value for value, standard in samples if standard)
+        stats["time_efficiency"] = round(percentile(ratios, 50) * 100, 1) if ratios else None
+        operator_stats[operator] = stats
+
+    top = sorted(by_geometry, key=lambda geometry_id: len(by_geometry[geometry_id]),
+                 reverse=True)[:CYCLE_TIME_TOP_GEOMETRIES]
+    dimensions = {g.id: g for g in ToolGeometry.query.filter(ToolGeometry.id.in_(top))} if top else {}
+    geometry_stats = [dict(summarize(by_geometry[geometry_id]),
+                           diameter=dimensions[geometry_id].diameter,
+                           flute_length=dimensions[geometry_id].flute_length,
+                           overall_length=dimensions[geometry_id].overall_length)
+                      for geometry_id in top if geometry_id in dimensions]
+
+    buckets = {}
+    for offset, value in zip(offsets, per_unit):
+        buckets.setdefault(int(offset // trend_days), []).append(value)
+    trend = [dict(summarize(buckets.get(index, ())),
+                  start=(since.date() + timedelta(days=index * trend_days)).isoformat())
+             for index in range((days + trend_days - 1) // trend_days)]
+
+    return {
+        "days": days,
+        "trend_days": trend_days,
+        "per_unit": summarize(per_unit),
+        "cycle": summarize(minutes),
+        "operators": operator_stats,
+        "geometries": geometry_stats,
+        "trend": trend,
+    }
+
+
+def get_operator_efficiency(cycle_times=None):
+    """Per-operator completion, rejection and time efficiency, with cycle time percentiles.
+
+    cycle_times is a get_cycle_time_analytics() result; the default window is
+    used when it is not given.
+    """
+    cycle_times = cycle_times or get_cycle_time_analytics()
+
+    # Per-operator totals from the event log, archive included, so work is
+    # credited to whoever recorded it rather than to the order's last operator
+    def operator_activity(events):
+        quantity = func.coalesce(events.quantity, 0)
+        return select(
+            events.operator.label("operator"),
+            func.count(distinct(case((events.action.in_(CYCLE_START_EVENTS), events.work_order_id))))
+            .label("total_orders"),
+            func.count(distinct(case(((events.action == "Completed") & events.quantity.isnot(None),
+                                       events.work_order_id)))).label("completed"),
+            func.count(distinct(case((events.action == "Partial", events.work_order_id))))
+            .label("partial"),
+            func.sum(case((events.action.in_(FINISH_EVENTS), quantity), else_=0)).label("completed_qty"),
+            func.sum(case((events.action == "Rejected", quantity), else_=0)).label("rejected_qty"),
+        ).where(events.operator.isnot(None)).group_by(events.operator)
+
+    # An order's events are either all live or all archived, so the distinct counts add up
+    activity = regroup(operator_activity(WorkOrderEvent), operator_activity(ArchivedWorkOrderEvent),
+                       keys=["operator"]).subquery()
+    today = db.session.query(OperatorDailyStats).filter(
+        OperatorDailyStats.day == datetime.utcnow().date()
+    ).subquery()
+
+    rows = db.session.query(
+        User.username,
+        activity.c.total_orders,
+        activity.c.completed,
+        activity.c.partial,
+        activity.c.completed_qty,
+        activity.c.rejected_qty,
+        today.c.completed_qty.label("daily_completed"),
+        today.c.rejected_qty.label("daily_rejected"),
+    ).outerjoin(activity, activity.c.operator == User.username) \
+     .outerjoin(today, today.c.operator == User.username) \
+     .filter(User.role == "operator") \
+     .order_by(User.id).all()
+
+    efficiency_data = []
+    for row in rows:
+        completed = row.completed or 0
+        total_orders = row.total_orders or 0
+        rejected_qty = row.rejected_qty or 0
+        total_qty = (row.completed_qty or 0) + rejected_qty
+        completion_rate = (completed / total_orders * 100) if total_orders else 0
+        rejection_rate = (rejected_qty / total_qty * 100) if total_qty else 0
+        cycle = cycle_times["operators"].get(row.username, {})
+        time_efficiency = cycle.get("time_efficiency")
+        if time_efficiency is None:
+            overall_score = (completion_rate + (100 - rejection_rate)) / 2
+        else:
+            # Working faster than standard counts as 100 so no one score part dominates
+            overall_score = (completion_rate + (100 - rejection_rate) + min(time_efficiency, 100)) / 3
+
+        efficiency_data.append({
+            "operator": row.username,
+            "completed": completed,
+            "partial": row.partial or 0,
+            "rejected_qty": rejected_qty,
+            "completion_rate": round(completion_rate, 1),
+            "rejection_rate": round(rejection_rate, 1),
+            "time_efficiency": time_efficiency,
+            "unit_minutes_p50": cycle.get("p50"),
+            "unit_minutes_p90": cycle.get("p90"),
+            "overall_score": round(overall_score, 1),
+            "daily_completed": row.daily_completed or 0,
+            "daily_rejected": row.daily_rejected or 0
+        })
+    return efficiency_data
+
+
+CYCLE_TIME_WINDOWS = (30, 90, 180, 365)
@@ -0,0 +1,93 @@
+"""Moving old completed orders out of the hot tables."""
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, literal
+
+from mes.cache import bump_data_version
+from mes.extensions import db
+from mes.models import ArchivedOrderTotals, ArchivedRejectionLog, ArchivedRejectionTotals, \
+    ArchivedWorkOrder, ArchivedWorkOrderEvent, RejectionLog, WorkOrder, WorkOrderEvent
+
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def _archive_batch(order_ids, archived_at):
+    """Move one batch of orders and their history to the archive tables, in one transaction."""
+    orders = WorkOrder.__table__
+    db.session.execute(ArchivedWorkOrder.__table__.insert().from_select(
+        [column.name for column in orders.columns] + ["archived_at"],
+        select(*orders.columns, literal(archived_at, db.DateTime)).where(orders.c.id.in_(order_ids))
+    ))
+
+    # Keep what these orders contributed to the dashboard aggregates
+    db.session.execute(ArchivedOrderTotals.__table__.insert().from_select(
+        ["operator", "diameter", "flute_length", "overall_length",
+         "orders", "quantity", "completed_qty", "rejected_qty"],
+        select(
+            WorkOrder.current_operator, WorkOrder.diameter,
+            WorkOrder.flute_length, WorkOrder.overall_length,
+            func.count(WorkOrder.id),
+            func.coalesce(func.sum(WorkOrder.quantity), 0),
+            func.coalesce(func.sum(WorkOrder.completed_qty), 0),
+            func.coalesce(func.sum(WorkOrder.rejected_qty), 0),
+        ).where(WorkOrder.id.in_(order_ids)).group_by(
+            WorkOrder.current_operator, WorkOrder.diameter,
+            WorkOrder.flute_length, WorkOrder.overall_length
+        )
+    ))
+    db.session.execute(ArchivedRejectionTotals.__table__.insert().from_select(
+        ["operator", "quantity"],
+        select(RejectionLog.operator, func.coalesce(func.sum(RejectionLog.quantity), 0))
+        .where(RejectionLog.work_order_id.in_(order_ids))
+        .group_by(RejectionLog.operator)
+    ))
+
+    for model, archive in ((RejectionLog, ArchivedRejectionLog), (WorkOrderEvent, ArchivedWorkOrderEvent)):
+        table = model.__table__
+        columns = [column for column in table.columns if column.name != "id"]
+        db.session.execute(archive.__table__.insert().from_select(
+            [column.name for column in columns],
+            select(*columns).where(table.c.work_order_id.in_(order_ids)).order_by(table.c.id)
+        ))
+        db.session.execute(table.delete().where(table.c.work_order_id.in_(order_ids)))
+    db.session.execute(orders.delete().where(orders.c.id.in_(order_ids)))
+    bump_data_version()
+    db.session.commit()
+
+
+def archive_completed_orders(days, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move orders completed more than `days` ago, with their rejections and events, to the archive.
+
+    Today's figures are always read from the hot tables, so days must be at
+    least 1. Returns the number of orders archived.
+    """
+    if days < 1:
+        raise ValueError("Orders must be at least a day old to be archived.")
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=days)
+
+    # SQLite hands the highest rowid out again once it is deleted; keep the
+    # newest order and the order owning the newest event so ids stay unique
+    keep = {
+        db.session.query(func.max(WorkOrder.id)).scalar(),
+        db.session.query(WorkOrderEvent.work_order_id).order_by(WorkOrderEvent.id.desc()).limit(1).scalar(),
+    }
+    keep.discard(None)
+
+    archived = 0
+    while True:
+        order_ids = [order_id for (order_id,) in db.session.query(WorkOrder.id).filter(
+            WorkOrder.status == "Completed",
+            WorkOrder.end_time < cutoff,
+            WorkOrder.id.notin_(keep)
+        ).order_by(WorkOrder.id).limit(batch_size)]
+        if not order_ids:
+            return archived
+        _archive_batch(order_ids, now)
+        archived += len(order_ids)
+
+
+def find_order(work_order_no):
+    """Look a work order up by number, falling back to the archive."""
+    return WorkOrder.query.filter_by(work_order_no=work_order_no).first() \
+        or ArchivedWorkOrder.query.filter_by(work_order_no=work_order_no).first()
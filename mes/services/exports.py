@@ -0,0 +1,180 @@
+"""Streamed CSV and XLSX exports."""
+from datetime import date, datetime
+from sqlalchemy import select, literal
+import io
+import csv
+import zipfile
+from xml.sax.saxutils import escape as xml_escape
+
+from mes.extensions import db
+from mes.helpers import day_range
+from mes.models import ArchivedRejectionLog, ArchivedWorkOrder, ArchivedWorkOrderEvent, RejectionLog, \
+    WorkOrder, WorkOrderEvent
+
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = ("csv", "xlsx")
+# For each export: archive and live (rows, orders) model pairs, the column the
+# date range applies to, the operator column, and the exported columns
+EXPORTS = {
+    "workorders": {
+        "sources": ((ArchivedWorkOrder, ArchivedWorkOrder), (WorkOrder, WorkOrder)),
+        "date_column": "end_time",
+        "operator_column": "current_operator",
+        "columns": ["work_order_no", "client_name", "po_number", "part_name", "quantity",
+                    "completed_qty", "rejected_qty", "diameter", "flute_length", "overall_length",
+                    "due_date", "status", "current_operator", "current_machine",
+                    "start_time", "end_time", "complaint"],
+    },
+    "rejections": {
+        "sources": ((ArchivedRejectionLog, ArchivedWorkOrder), (RejectionLog, WorkOrder)),
+        "date_column": "timestamp",
+        "operator_column": "operator",
+        "columns": ["work_order_no", "operator", "quantity", "reason", "timestamp"],
+    },
+    "events": {
+        "sources": ((ArchivedWorkOrderEvent, ArchivedWorkOrder), (WorkOrderEvent, WorkOrder)),
+        "date_column": "ts",
+        "operator_column": "operator",
+        "columns": ["work_order_no", "ts", "action", "operator", "machine", "quantity", "reason"],
+    },
+}
+
+
+def export_rows(kind, start=None, end=None, operator=None, status=None):
+    """Yield export rows, archived history first, streamed EXPORT_BATCH_SIZE rows at a time.
+
+    start and end are inclusive dates on the export's date column; status
+    filters on the order's status. Each table is read in id order, so SQLite
+    never has to sort.
+    """
+    spec = EXPORTS[kind]
+    for archived, (rows, orders) in zip((True, False), spec["sources"]):
+        columns = [getattr(rows, name) if name in rows.__table__.c else getattr(orders, name)
+                   for name in spec["columns"]]
+        stmt = select(*columns, literal(archived)).select_from(rows)
+        if rows is not orders:
+            stmt = stmt.join(orders, orders.id == rows.work_order_id)
+        date_column = getattr(rows, spec["date_column"])
+        if start:
+            stmt = stmt.where(date_column >= day_range(start)[0])
+        if end:
+            stmt = stmt.where(date_column < day_range(end)[1])
+        if operator:
+            stmt = stmt.where(getattr(rows, spec["operator_column"]) == operator)
+        if status:
+            stmt = stmt.where(orders.status == status)
+        stmt = stmt.order_by(rows.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        yield from db.session.execute(stmt)
+
+
+def export_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    return value
+
+
+def stream_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel reads the file as UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([export_value(value) for value in row])
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that collects what zipfile writes until drained."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+XLSX_PARTS = [
+    ("[Content_Types].xml",
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ("_rels/.rels",
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Target="xl/workbook.xml" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+     '</Relationships>'),
+    ("xl/_rels/workbook.xml.rels",
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+     '</Relationships>'),
+]
+# Characters XML 1.0 does not allow, even escaped
+XML_ILLEGAL = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        value = export_value(value)
+        if isinstance(value, (int, float)):
+            cells.append(f"<c><v>{value}</v></c>")
+        else:
+            value = xml_escape(str(value).translate(XML_ILLEGAL))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{value}</t></is></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+def stream_xlsx(sheet_name, header, rows):
+    """Write a one-sheet workbook as it is sent: the zip goes out entry by entry, rows in batches."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in XLSX_PARTS:
+            workbook.writestr(name, content)
+        workbook.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{xml_escape(sheet_name)}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        )
+        yield sink.drain()
+        with workbook.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                         '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                         f"<sheetData>{_xlsx_row(header)}").encode())
+            for count, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode())
+                if count % EXPORT_BATCH_SIZE == 0:
+                    yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
@@ -0,0 +1,112 @@
+"""Tool geometry buckets and their rollup."""
+from flask import current_app
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from collections import Counter
+
+from mes.cache import bump_data_version
+from mes.extensions import db
+from mes.helpers import regroup
+from mes.models import ArchivedWorkOrder, ToolGeometry, WorkOrder
+
+
+def geometry_key(diameter, flute_length, overall_length):
+    """Bucket raw dimensions to the configured tolerance; None unless all three are given."""
+    if diameter is None or flute_length is None or overall_length is None:
+        return None
+    step = current_app.config["GEOMETRY_TOLERANCE_MM"]
+    # The final round() drops float noise such as 6.000000000000001
+    return tuple(round(round(value / step) * step, 6)
+                 for value in (diameter, flute_length, overall_length))
+
+
+def resolve_geometries(keys):
+    """Return {key: ToolGeometry.id} for bucketed keys, creating missing rows."""
+    keys = list(set(keys))
+    if not keys:
+        return {}
+    db.session.execute(sqlite_insert(ToolGeometry).values([
+        {"diameter": d, "flute_length": f, "overall_length": o} for d, f, o in keys
+    ]).on_conflict_do_nothing(index_elements=["diameter", "flute_length", "overall_length"]))
+    dimensions = (ToolGeometry.diameter, ToolGeometry.flute_length, ToolGeometry.overall_length)
+    return {(d, f, o): geometry_id for geometry_id, d, f, o in db.session.execute(
+        select(ToolGeometry.id, *dimensions).where(tuple_(*dimensions).in_(keys))
+    )}
+
+
+def record_geometry_activity(geometry_id, orders=0, completed=0, rejected=0):
+    """Add to a geometry's rollup. Runs in the caller's transaction."""
+    if geometry_id is None:
+        return
+    db.session.execute(ToolGeometry.__table__.update().where(ToolGeometry.id == geometry_id).values(
+        orders=ToolGeometry.orders + orders,
+        completed_qty=ToolGeometry.completed_qty + completed,
+        rejected_qty=ToolGeometry.rejected_qty + rejected,
+    ))
+
+
+def assign_tool_geometry(orders):
+    """Link new orders to their geometry and count them in its rollup, in the caller's transaction."""
+    keys = [(order, geometry_key(order.diameter, order.flute_length, order.overall_length))
+            for order in orders]
+    ids = resolve_geometries(key for _, key in keys if key)
+    counts = Counter()
+    for order, key in keys:
+        if key:
+            order.geometry_id = ids[key]
+            counts[order.geometry_id] += 1
+    for geometry_id, count in counts.items():
+        record_geometry_activity(geometry_id, orders=count)
+
+
+def rebuild_tool_geometry():
+    """Re-bucket every live and archived order and recompute the geometry rollup.
+
+    Needed after GEOMETRY_TOLERANCE_MM changes. Returns the number of geometries.
+    """
+    for model in (WorkOrder, ArchivedWorkOrder):
+        db.session.execute(model.__table__.update().values(geometry_id=None))
+    ToolGeometry.query.delete()
+
+    raw = set()
+    for model in (WorkOrder, ArchivedWorkOrder):
+        raw.update(db.session.query(model.diameter, model.flute_length, model.overall_length)
+                   .filter(model.diameter.isnot(None), model.flute_length.isnot(None),
+                           model.overall_length.isnot(None)).distinct())
+    ids = resolve_geometries(geometry_key(*dimensions) for dimensions in raw)
+    for d, f, o in raw:
+        for model in (WorkOrder, ArchivedWorkOrder):
+            db.session.execute(model.__table__.update().where(
+                model.diameter == d, model.flute_length == f, model.overall_length == o
+            ).values(geometry_id=ids[geometry_key(d, f, o)]))
+
+    totals = regroup(*(
+        select(model.geometry_id, func.count(model.id).label("orders"),
+               func.sum(model.completed_qty).label("completed_qty"),
+               func.sum(model.rejected_qty).label("rejected_qty"))
+        .where(model.geometry_id.isnot(None)).group_by(model.geometry_id)
+        for model in (WorkOrder, ArchivedWorkOrder)
+    ), keys=["geometry_id"])
+    for geometry_id, orders, completed, rejected in db.session.execute(totals).all():
+        record_geometry_activity(geometry_id, orders=orders, completed=completed or 0,
+                                 rejected=rejected or 0)
+    bump_data_version()
+    db.session.commit()
+    return len(ids)
+
+
+def find_similar_geometries(diameter, flute_length, overall_length, limit=5):
+    """Return up to `limit` geometries with orders, nearest first, within SIMILAR_TOOL_WINDOW_MM."""
+    window = current_app.config["SIMILAR_TOOL_WINDOW_MM"]
+    # Range scan on the leading diameter column of the unique index
+    candidates = ToolGeometry.query.filter(
+        ToolGeometry.diameter.between(diameter - window, diameter + window),
+        ToolGeometry.flute_length.between(flute_length - window, flute_length + window),
+        ToolGeometry.overall_length.between(overall_length - window, overall_length + window),
+        ToolGeometry.orders > 0
+    ).all()
+
+    def distance(geometry):
+        return (abs(geometry.diameter - diameter) + abs(geometry.flute_length - flute_length)
+                + abs(geometry.overall_length - overall_length))
+    return sorted(candidates, key=distance)[:limit]
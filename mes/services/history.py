@@ -0,0 +1,82 @@
+"""The work order event log."""
+from datetime import datetime
+from sqlalchemy import select, literal, union_all
+
+from mes.cache import bump_data_version
+from mes.extensions import db
+from mes.models import ArchivedWorkOrder, ArchivedWorkOrderEvent, RejectionLog, WorkOrder, WorkOrderEvent
+from mes.services.live import track_order_change
+
+# Events that record finished units. "Waiting for Handover" only appears on
+# events seeded from legacy orders, carrying the order's completed_qty.
+FINISH_EVENTS = ("Completed", "Partial", "Waiting for Handover")
+
+
+def log_order_event(order, action, operator=None, quantity=None, reason=None, machine=None, when=None):
+    """Append an event for a work order. Runs in the caller's transaction.
+
+    Every order state change goes through here, so it also bumps the data
+    version that cached dashboard aggregates are keyed on.
+    """
+    if order.id is None:
+        db.session.flush()
+    bump_data_version()
+    track_order_change(order)
+    db.session.add(WorkOrderEvent(
+        work_order_id=order.id,
+        ts=when or datetime.utcnow(),
+        action=action,
+        operator=operator,
+        machine=machine,
+        quantity=quantity,
+        reason=reason or None,
+    ))
+
+
+def get_order_logs(order):
+    """Return an order's history as display rows, read in one (work_order_id, ts) range scan."""
+    events_model = ArchivedWorkOrderEvent if isinstance(order, ArchivedWorkOrder) else WorkOrderEvent
+    events = events_model.query.filter_by(work_order_id=order.id) \
+        .order_by(events_model.ts, events_model.id).all()
+    return [{
+        "timestamp": event.ts.strftime("%Y-%m-%d %H:%M"),
+        "operator": event.operator or "",
+        "action": event.action,
+        "quantity": "" if event.quantity is None else event.quantity,
+        "reason": event.reason or "",
+    } for event in events]
+
+
+def seed_workorder_events():
+    """Create events from the legacy timestamp columns and RejectionLog.
+
+    Only orders that have no events yet are seeded, so this is safe to rerun.
+    """
+    unseeded = ~select(WorkOrderEvent.id).where(
+        WorkOrderEvent.work_order_id == WorkOrder.id
+    ).exists()
+    no_qty = literal(None, db.Integer)
+    no_text = literal(None, db.String)
+
+    legacy = union_all(
+        select(WorkOrder.id, WorkOrder.start_time, literal("Started"),
+               WorkOrder.current_operator, no_qty, no_text)
+        .where(WorkOrder.start_time.isnot(None), unseeded),
+        select(WorkOrder.id, WorkOrder.last_handover_time, literal("Handed Over"),
+               WorkOrder.current_operator, no_qty, WorkOrder.complaint)
+        .where(WorkOrder.last_handover_time.isnot(None), unseeded),
+        select(WorkOrder.id, WorkOrder.end_time, WorkOrder.status,
+               WorkOrder.current_operator, WorkOrder.completed_qty, WorkOrder.complaint)
+        .where(WorkOrder.end_time.isnot(None), unseeded),
+        select(RejectionLog.work_order_id, RejectionLog.timestamp, literal("Rejected"),
+               RejectionLog.operator, RejectionLog.quantity, RejectionLog.reason)
+        .join(WorkOrder, WorkOrder.id == RejectionLog.work_order_id)
+        .where(RejectionLog.timestamp.isnot(None), unseeded),
+    )
+    result = db.session.execute(
+        WorkOrderEvent.__table__.insert().from_select(
+            ["work_order_id", "ts", "action", "operator", "quantity", "reason"], legacy
+        )
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,152 @@
+"""Bulk work order import from CSV and XLSX."""
+from datetime import datetime
+import io
+import csv
+
+from mes.extensions import db
+from mes.helpers import parse_due_date
+from mes.models import ArchivedWorkOrder, WorkOrder
+from mes.services.geometry import assign_tool_geometry
+from mes.services.history import log_order_event
+from mes.services.qr import queue_qr_label
+
+
+IMPORT_FIELDS = [
+    "work_order_no", "client_name", "po_number", "part_name", "quantity",
+    "diameter", "flute_length", "overall_length", "due_date",
+]
+IMPORT_CHUNK_SIZE = 500
+
+
+def _normalize_header(name):
+    return str(name or "").strip().lower().replace(" ", "_")
+
+
+def iter_import_rows(stream, filename):
+    """Yield (row_number, {field: value}) from a CSV or XLSX upload without loading it whole."""
+    if filename.lower().endswith(".xlsx"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Excel import needs the openpyxl package; upload a CSV instead.")
+        sheet = load_workbook(stream, read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+    else:
+        rows = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+
+    header = None
+    for row_number, values in enumerate(rows, start=1):
+        if header is None:
+            header = [_normalize_header(v) for v in values]
+            missing = {"work_order_no", "quantity"} - set(header)
+            if missing:
+                raise ValueError(f"Missing required column(s): {', '.join(sorted(missing))}")
+            continue
+        if not any(v not in (None, "") for v in values):
+            continue
+        yield row_number, dict(zip(header, values))
+
+
+def parse_import_row(row):
+    """Convert one imported row into WorkOrder keyword arguments, raising ValueError if invalid."""
+    def text_value(field):
+        value = row.get(field)
+        if isinstance(value, datetime):
+            value = value.strftime("%Y-%m-%d")
+        return str(value).strip() if value not in (None, "") else None
+
+    def number(field, kind):
+        value = text_value(field)
+        if value is None:
+            return None
+        try:
+            return kind(float(value)) if kind is int else kind(value)
+        except ValueError:
+            raise ValueError(f"{field} must be a number, got '{value}'")
+
+    work_order_no = text_value("work_order_no")
+    if not work_order_no:
+        raise ValueError("work_order_no is required")
+    quantity = number("quantity", int)
+    if not quantity or quantity <= 0:
+        raise ValueError("quantity must be greater than 0")
+    try:
+        due_date = parse_due_date(row.get("due_date"))
+    except ValueError as e:
+        raise ValueError(f"due_date {e}")
+
+    return {
+        "work_order_no": work_order_no,
+        "client_name": text_value("client_name"),
+        "po_number": text_value("po_number"),
+        "part_name": text_value("part_name"),
+        "quantity": quantity,
+        "diameter": number("diameter", float),
+        "flute_length": number("flute_length", float),
+        "overall_length": number("overall_length", float),
+        "due_date": due_date,
+    }
+
+
+def _import_chunk(chunk, seen, report, created_by):
+    parsed = []
+    for row_number, row in chunk:
+        try:
+            fields = parse_import_row(row)
+        except ValueError as e:
+            report.append({"row": row_number, "work_order_no": row.get("work_order_no") or "",
+                           "status": "error", "message": str(e)})
+            continue
+        if fields["work_order_no"] in seen:
+            report.append({"row": row_number, "work_order_no": fields["work_order_no"],
+                           "status": "error", "message": "Duplicate work order in file"})
+            continue
+        seen.add(fields["work_order_no"])
+        parsed.append((row_number, fields))
+
+    # One set-based lookup per chunk instead of a query per row
+    numbers = [fields["work_order_no"] for _, fields in parsed]
+    existing = set()
+    if numbers:
+        for model in (WorkOrder, ArchivedWorkOrder):
+            existing.update(no for (no,) in db.session.query(model.work_order_no)
+                            .filter(model.work_order_no.in_(numbers)))
+
+    orders = []
+    for row_number, fields in parsed:
+        if fields["work_order_no"] in existing:
+            report.append({"row": row_number, "work_order_no": fields["work_order_no"],
+                           "status": "error", "message": "Work order already exists"})
+            continue
+        orders.append(WorkOrder(status="Not Started", **fields))
+        report.append({"row": row_number, "work_order_no": fields["work_order_no"],
+                       "status": "created", "message": ""})
+
+    if orders:
+        assign_tool_geometry(orders)
+        db.session.add_all(orders)
+        db.session.flush()
+        for order in orders:
+            log_order_event(order, "Created", operator=created_by, reason="Bulk import")
+        db.session.commit()
+        for order in orders:
+            queue_qr_label(order.work_order_no, inline_when_full=False)
+
+
+def import_workorders(rows, created_by=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """Insert work orders from (row_number, row) pairs in chunked transactions.
+
+    Returns a per-row report of created orders and errors, in file order.
+    """
+    report = []
+    seen = set()
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, seen, report, created_by)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, seen, report, created_by)
+    report.sort(key=lambda r: r["row"])
+    return report
@@ -0,0 +1,241 @@
+"""Printable A4 PDF sheets of QR labels."""
+import os
+import io
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from mes.extensions import db
+from mes.models import WorkOrder
+from mes.services.qr import qr_cache, qr_label_path, render_qr_label
+
+
+# Sheets of labels for printing in one go. Each label tile is the same cached
+# PNG that /qr/<order>.png serves; its zlib-compressed pixel data goes into the
+# PDF unchanged, so a page costs little more than copying bytes.
+MM = 72 / 25.4  # PDF points per millimetre
+A4_POINTS = (595.28, 841.89)
+LABEL_SHEET_MARGIN_MM = 8
+LABEL_SHEET_PADDING_MM = 1.5
+# Layout name -> (columns, rows) on A4; 3x7 matches common 63.5 x 38.1 mm label stock
+LABEL_SHEET_LAYOUTS = {
+    "a4-3x7": (3, 7),
+    "a4-4x10": (4, 10),
+    "a4-2x4": (2, 4),
+}
+LABEL_SHEET_MAX_LABELS = 5000
+# Fewer missing tiles than this are rendered inline; starting the pool costs more
+LABEL_POOL_MIN_RENDERS = 8
+LABEL_POOL_WORKERS = min(4, os.cpu_count() or 1)
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+label_pool = None
+label_pool_lock = threading.Lock()
+
+
+def get_label_pool():
+    """Return the process pool for label renders, started on first use.
+
+    Workers are spawned rather than forked, since gunicorn's gthread workers
+    hold locks in other threads; each child imports this module, which no
+    longer builds an app or touches the database.
+    """
+    global label_pool
+    with label_pool_lock:
+        if label_pool is None:
+            label_pool = ProcessPoolExecutor(max_workers=LABEL_POOL_WORKERS,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return label_pool
+
+
+def render_label_png(order_no):
+    buffer = io.BytesIO()
+    render_qr_label(order_no).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_label_pngs(order_numbers):
+    """Render labels on the process pool; returns {order_no: png_bytes}."""
+    global label_pool
+    try:
+        return dict(zip(order_numbers, get_label_pool().map(render_label_png, order_numbers,
+                                                            chunksize=16)))
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool on the next request
+        with label_pool_lock:
+            label_pool = None
+        raise
+
+
+def cached_label_png(order_no):
+    """Return a label's PNG from the memory cache or the warm disk tier, or None."""
+    entry = qr_cache.get(order_no)
+    if entry is not None:
+        return entry[0]
+    filepath = qr_label_path(order_no)
+    if os.path.exists(filepath):
+        with open(filepath, "rb") as f:
+            data = f.read()
+        qr_cache.put(order_no, data, hashlib.sha256(data).hexdigest()[:32])
+        return data
+    return None
+
+
+def label_tiles(order_numbers):
+    """Yield (order_no, png_bytes) in order, rendering missing tiles across the process pool."""
+    tiles = {no: cached_label_png(no) for no in order_numbers}
+    missing = [no for no, data in tiles.items() if data is None]
+    pending = render_label_pngs(missing) if len(missing) >= LABEL_POOL_MIN_RENDERS else {}
+    for no in order_numbers:
+        data = tiles[no]
+        if data is None:
+            data = pending[no] if no in pending else render_label_png(no)
+            tiles[no] = data
+            qr_cache.put(no, data, hashlib.sha256(data).hexdigest()[:32])
+        yield no, data
+
+
+def png_image_xobject(data):
+    """Return (width, height, dictionary, stream) embedding a PNG's IDAT data as a PDF image.
+
+    PDF's FlateDecode with PNG predictors reads the IDAT stream as is; only
+    8-bit, non-interlaced greyscale or RGB images qualify, and anything else
+    is re-encoded as RGB first.
+    """
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError("not a PNG image")
+    pos, idat = 8, []
+    width = height = None
+    while pos < len(data):
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        kind = data[pos + 4:pos + 8]
+        body = data[pos + 8:pos + 8 + length]
+        pos += length + 12
+        if kind == b"IHDR":
+            width, height = int.from_bytes(body[0:4], "big"), int.from_bytes(body[4:8], "big")
+            depth, color_type, interlace = body[8], body[9], body[12]
+            if depth != 8 or color_type not in (0, 2) or interlace:
+                from PIL import Image
+
+                buffer = io.BytesIO()
+                Image.open(io.BytesIO(data)).convert("RGB").save(buffer, format="PNG")
+                return png_image_xobject(buffer.getvalue())
+            colors, color_space = (1, "/DeviceGray") if color_type == 0 else (3, "/DeviceRGB")
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+    stream = b"".join(idat)
+    dictionary = (f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                  f"/ColorSpace {color_space} /BitsPerComponent 8 /Filter /FlateDecode "
+                  f"/DecodeParms << /Predictor 15 /Colors {colors} /BitsPerComponent 8 "
+                  f"/Columns {width} >>")
+    return width, height, dictionary, stream
+
+
+def label_cells(layout):
+    """Return the (x, y, width, height) cell of each label on a page, top-left first, in points."""
+    columns, rows = LABEL_SHEET_LAYOUTS[layout]
+    page_width, page_height = A4_POINTS
+    margin = LABEL_SHEET_MARGIN_MM * MM
+    cell_width = (page_width - 2 * margin) / columns
+    cell_height = (page_height - 2 * margin) / rows
+    return [(margin + column * cell_width, page_height - margin - (row + 1) * cell_height,
+             cell_width, cell_height)
+            for row in range(rows) for column in range(columns)]
+
+
+def stream_label_pdf(tiles, layout):
+    """Write labels onto A4 pages as a PDF, yielding each page as soon as it is laid out.
+
+    Objects 1 and 2 (catalog and page tree) are written last, once every page
+    is known; the cross-reference table at the end lists them by offset.
+    """
+    cells = label_cells(layout)
+    padding = LABEL_SHEET_PADDING_MM * MM
+    offsets = {}
+    written = 0
+    next_id = 3
+    page_ids = []
+
+    def obj(object_id, dictionary, stream=None):
+        nonlocal written
+        offsets[object_id] = written
+        if stream is None:
+            chunk = f"{object_id} 0 obj\n<< {dictionary} >>\nendobj\n".encode()
+        else:
+            chunk = (f"{object_id} 0 obj\n<< {dictionary} /Length {len(stream)} >>\nstream\n".encode()
+                     + stream + b"\nendstream\nendobj\n")
+        written += len(chunk)
+        return chunk
+
+    def page(placed):
+        nonlocal next_id
+        chunks, resources, content = [], [], []
+        for index, ((x, y, cell_width, cell_height), data) in enumerate(placed):
+            width, height, dictionary, stream = png_image_xobject(data)
+            scale = min((cell_width - 2 * padding) / width, (cell_height - 2 * padding) / height)
+            w, h = width * scale, height * scale
+            content.append(f"q {w:.2f} 0 0 {h:.2f} {x + (cell_width - w) / 2:.2f} "
+                           f"{y + (cell_height - h) / 2:.2f} cm /Im{index} Do Q")
+            resources.append(f"/Im{index} {next_id} 0 R")
+            chunks.append(obj(next_id, dictionary, stream))
+            next_id += 1
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        chunks.append(obj(content_id, "", "\n".join(content).encode()))
+        chunks.append(obj(page_id, f"/Type /Page /Parent 2 0 R /Contents {content_id} 0 R "
+                                   f"/MediaBox [0 0 {A4_POINTS[0]} {A4_POINTS[1]}] "
+                                   f"/Resources << /XObject << {' '.join(resources)} >> >>"))
+        page_ids.append(page_id)
+        return b"".join(chunks)
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    written = len(header)
+    yield header
+    placed = []
+    for _, data in tiles:
+        placed.append((cells[len(placed)], data))
+        if len(placed) == len(cells):
+            yield page(placed)
+            placed = []
+    if placed or not page_ids:
+        yield page(placed)
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    tail = [obj(2, f"/Type /Pages /Kids [{kids}] /Count {len(page_ids)}"),
+            obj(1, "/Type /Catalog /Pages 2 0 R")]
+    xref = [f"xref\n0 {next_id}\n", "0000000000 65535 f \n"]
+    xref += [f"{offsets[object_id]:010d} 00000 n \n" for object_id in range(1, next_id)]
+    xref.append(f"trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{written}\n%%EOF\n")
+    yield b"".join(tail) + "".join(xref).encode()
+
+
+def label_sheet_orders(numbers=None, status=None, due_from=None, due_to=None, client=None):
+    """Return the work order numbers to print, capped at LABEL_SHEET_MAX_LABELS.
+
+    An explicit list of numbers keeps its order and drops unknown or repeated
+    numbers; otherwise the filters select live orders in id order. status
+    accepts "active" as on the work order list.
+    """
+    if numbers:
+        numbers = list(dict.fromkeys(numbers))[:LABEL_SHEET_MAX_LABELS]
+        known = set()
+        for start in range(0, len(numbers), 500):
+            known.update(no for (no,) in db.session.query(WorkOrder.work_order_no)
+                         .filter(WorkOrder.work_order_no.in_(numbers[start:start + 500])))
+        return [no for no in numbers if no in known]
+    query = db.session.query(WorkOrder.work_order_no)
+    if status == "active":
+        query = query.filter(WorkOrder.status != "Completed")
+    elif status:
+        query = query.filter(WorkOrder.status == status)
+    if due_from:
+        query = query.filter(WorkOrder.due_date >= due_from)
+    if due_to:
+        query = query.filter(WorkOrder.due_date <= due_to)
+    if client:
+        query = query.filter(WorkOrder.client_name == client)
+    return [no for (no,) in query.order_by(WorkOrder.id).limit(LABEL_SHEET_MAX_LABELS)]
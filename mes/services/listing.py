@@ -0,0 +1,126 @@
+"""Keyset-paginated work order lists and the dispatch queue."""
+from datetime import date, datetime, timedelta
+from sqlalchemy import tuple_
+
+from mes.models import DISPATCH_OPEN, DISPATCH_PRIORITY, WorkOrder
+
+
+WORKORDER_PAGE_SIZE = 50
+WORKORDER_MAX_PAGE_SIZE = 200
+
+
+def paginate_workorders(status=None, sort="id", after=None, per_page=WORKORDER_PAGE_SIZE):
+    """Return one keyset page of work orders and the cursor for the next page.
+
+    sort="id" lists newest orders first; sort="due_date" lists the earliest
+    due dates first with id as the tie-breaker. status may be a status name,
+    "active" (anything not Completed) or None for all orders.
+    """
+    query = WorkOrder.query
+    if status == "active":
+        query = query.filter(WorkOrder.status != "Completed")
+    elif status:
+        query = query.filter(WorkOrder.status == status)
+
+    if sort == "due_date":
+        if after:
+            due_date, _, last_id = after.rpartition("|")
+            try:
+                last_id = int(last_id)
+                due_date = date.fromisoformat(due_date) if due_date else None
+            except ValueError:
+                due_date, last_id = None, 0
+            if due_date:
+                query = query.filter(
+                    (WorkOrder.due_date > due_date) |
+                    ((WorkOrder.due_date == due_date) & (WorkOrder.id > last_id))
+                )
+            else:
+                # NULL due dates sort first, so the rest of them and every dated order follow
+                query = query.filter(
+                    WorkOrder.due_date.isnot(None) |
+                    (WorkOrder.due_date.is_(None) & (WorkOrder.id > last_id))
+                )
+        query = query.order_by(WorkOrder.due_date, WorkOrder.id)
+    else:
+        if after:
+            try:
+                query = query.filter(WorkOrder.id < int(after))
+            except ValueError:
+                pass
+        query = query.order_by(WorkOrder.id.desc())
+
+    orders = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(orders) > per_page:
+        orders = orders[:per_page]
+        last = orders[-1]
+        if sort == "due_date":
+            next_cursor = f"{last.due_date.isoformat() if last.due_date else ''}|{last.id}"
+        else:
+            next_cursor = str(last.id)
+    return orders, next_cursor
+
+
+DISPATCH_PAGE_SIZE = 50
+
+
+def dispatch_queue(until=None, after=None, per_page=DISPATCH_PAGE_SIZE):
+    """Return one keyset page of open orders in dispatch order and the cursor for the next page.
+
+    Reads ix_work_order_dispatch in order, so a page costs the same however
+    much history the table holds. Orders without a due date are not queued;
+    until limits the queue to orders due on or before that date.
+    """
+    query = WorkOrder.query.filter(DISPATCH_OPEN)
+    if until:
+        query = query.filter(WorkOrder.due_date <= until)
+    if after:
+        try:
+            due_date, priority, last_id = after.split("|")
+            query = query.filter(tuple_(WorkOrder.due_date, DISPATCH_PRIORITY, WorkOrder.id) >
+                                 (date.fromisoformat(due_date), int(priority), int(last_id)))
+        except ValueError:
+            pass
+    orders = query.order_by(WorkOrder.due_date, DISPATCH_PRIORITY, WorkOrder.id) \
+        .limit(per_page + 1).all()
+    next_cursor = None
+    if len(orders) > per_page:
+        orders = orders[:per_page]
+        last = orders[-1]
+        priority = last.completed_qty + last.rejected_qty - last.quantity
+        next_cursor = f"{last.due_date.isoformat()}|{priority}|{last.id}"
+    return orders, next_cursor
+
+
+def count_unscheduled_orders():
+    return WorkOrder.query.filter(WorkOrder.status != "Completed", WorkOrder.due_date.is_(None)).count()
+
+
+def dispatch_entry(order, today):
+    return {
+        "work_order_no": order.work_order_no,
+        "client_name": order.client_name,
+        "part_name": order.part_name,
+        "due_date": order.due_date.isoformat(),
+        "days_left": (order.due_date - today).days,
+        "late": order.due_date < today,
+        "quantity": order.quantity,
+        "remaining": order.quantity - order.completed_qty - order.rejected_qty,
+        "status": order.status,
+        "current_operator": order.current_operator,
+        "current_machine": order.current_machine,
+    }
+
+
+def parse_until(value):
+    """Read the ?until= filter: an ISO date, "late" (due before today) or "today"."""
+    today = datetime.utcnow().date()
+    if value == "late":
+        return today - timedelta(days=1)
+    if value == "today":
+        return today
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
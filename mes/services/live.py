@@ -0,0 +1,212 @@
+"""Live order events for dashboards and the work order number autocomplete index."""
+from flask import current_app
+from sqlalchemy import func, event
+import time
+import threading
+from collections import deque
+from bisect import bisect_left
+from itertools import islice
+
+from mes.extensions import db
+from mes.models import WorkOrder, WorkOrderEvent
+
+
+SSE_POLL_INTERVAL = 0.5
+SSE_HEARTBEAT = 15
+# Streams end after this long; EventSource reconnects and resumes from Last-Event-ID
+SSE_MAX_STREAM_SECONDS = 300
+# A dashboard turned away by SSE_MAX_STREAMS tries again after this long
+SSE_BUSY_RETRY_SECONDS = 30
+
+
+def order_event_payload(event, order):
+    return {
+        "id": event.id,
+        "action": event.action,
+        "ts": event.ts.strftime("%Y-%m-%d %H:%M"),
+        "operator": event.operator,
+        "quantity": event.quantity,
+        "work_order_no": order.work_order_no,
+        "client_name": order.client_name,
+        "part_name": order.part_name,
+        "status": order.status,
+        "quantity_total": order.quantity,
+        "completed_qty": order.completed_qty,
+        "rejected_qty": order.rejected_qty,
+        "current_operator": order.current_operator,
+        "current_machine": order.current_machine,
+    }
+
+
+class OrderEventBroadcaster:
+    """Polls committed WorkOrderEvents once per worker and fans them out to every stream.
+
+    Database load is one indexed id range query per poll interval per worker,
+    however many dashboards are watching.
+    """
+
+    def __init__(self, poll_interval, backlog=500):
+        self.poll_interval = poll_interval
+        self.recent = deque(maxlen=backlog)
+        self.last_id = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        self.app = None
+        self.listeners = []
+        self.streams = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            # The poller outlives the request that starts it, so it keeps the app itself
+            self.app = current_app._get_current_object()
+            self.last_id = db.session.query(func.max(WorkOrderEvent.id)).scalar() or 0
+            self.thread = threading.Thread(target=self._run, name="order-events", daemon=True)
+            self.thread.start()
+
+    def open_stream(self, limit):
+        """Claim one of limit stream slots in this worker; False when all are taken."""
+        with self.lock:
+            if self.streams >= limit:
+                return False
+            self.streams += 1
+            return True
+
+    def close_stream(self):
+        with self.lock:
+            self.streams -= 1
+
+    def _poll(self):
+        with self.app.app_context():
+            rows = db.session.query(WorkOrderEvent, WorkOrder) \
+                .join(WorkOrder, WorkOrder.id == WorkOrderEvent.work_order_id) \
+                .filter(WorkOrderEvent.id > self.last_id) \
+                .order_by(WorkOrderEvent.id).limit(self.recent.maxlen).all()
+            return [(event.id, order_event_payload(event, order)) for event, order in rows]
+
+    def _run(self):
+        while True:
+            try:
+                events = self._poll()
+            except Exception:
+                self.app.logger.exception("Polling order events failed")
+                events = []
+            if events:
+                with self.condition:
+                    self.recent.extend(events)
+                    self.last_id = events[-1][0]
+                    self.condition.notify_all()
+                for listener in self.listeners:
+                    listener(events)
+            time.sleep(self.poll_interval)
+
+    def events_after(self, after_id):
+        """Polled events newer than after_id that are still in the backlog."""
+        with self.condition:
+            return [(event_id, payload) for event_id, payload in self.recent if event_id > after_id]
+
+    def wait_for(self, after_id, timeout):
+        """Block until events newer than after_id exist or timeout passes; return them."""
+        with self.condition:
+            if self.last_id <= after_id:
+                self.condition.wait(timeout)
+        return self.events_after(after_id)
+
+
+order_events = OrderEventBroadcaster(SSE_POLL_INTERVAL)
+
+
+AUTOCOMPLETE_LIMIT = 10
+
+
+class OrderNumberIndex:
+    """Sorted in-memory list of open work order numbers, searched by prefix with bisect.
+
+    Built from the database on first use. Commits in this worker update it
+    as soon as they land (see track_order_change); writes by other workers
+    arrive through the order event poller within SSE_POLL_INTERVAL.
+    """
+
+    def __init__(self):
+        self.numbers = []
+        self.loaded = False
+        self.listening = False
+        self.last_event_id = 0
+        self.lock = threading.Lock()
+
+    def load(self):
+        order_events.start()
+        with self.lock:
+            if self.loaded:
+                return
+            # Listen before taking the snapshot; polls that land meanwhile wait on the lock
+            if not self.listening:
+                order_events.listeners.append(self.apply_events)
+                self.listening = True
+            self.last_event_id = db.session.query(func.max(WorkOrderEvent.id)).scalar() or 0
+            self.numbers = [no for (no,) in db.session.query(WorkOrder.work_order_no)
+                            .filter(WorkOrder.status != "Completed").order_by(WorkOrder.work_order_no)]
+            # The session's read snapshot may predate polls that already went past the
+            # listeners, so replay whatever the poller has seen beyond it
+            self._apply_events(order_events.events_after(self.last_event_id))
+            self.loaded = True
+
+    def _apply(self, work_order_no, status):
+        index = bisect_left(self.numbers, work_order_no)
+        present = index < len(self.numbers) and self.numbers[index] == work_order_no
+        if status == "Completed" and present:
+            del self.numbers[index]
+        elif status != "Completed" and not present:
+            self.numbers.insert(index, work_order_no)
+
+    def update(self, work_order_no, status):
+        """Add an open order or drop a completed one; applying a change twice is harmless."""
+        with self.lock:
+            if self.loaded:
+                self._apply(work_order_no, status)
+
+    def _apply_events(self, events):
+        for event_id, payload in events:
+            if event_id > self.last_event_id:
+                self._apply(payload["work_order_no"], payload["status"])
+                self.last_event_id = event_id
+
+    def apply_events(self, events):
+        with self.lock:
+            if self.loaded:
+                self._apply_events(events)
+
+    def suggest(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        if not self.loaded:
+            self.load()
+        with self.lock:
+            index = bisect_left(self.numbers, prefix)
+            return [no for no in islice(self.numbers, index, index + limit) if no.startswith(prefix)]
+
+
+order_number_index = OrderNumberIndex()
+
+
+def track_order_change(order):
+    """Remember an order changed in this transaction, for the autocomplete index."""
+    db.session.info.setdefault("changed_orders", set()).add(order)
+
+
+@event.listens_for(db.session, "before_commit")
+def snapshot_changed_orders(session):
+    changed = session.info.pop("changed_orders", ())
+    session.info["changed_order_states"] = [(order.work_order_no, order.status) for order in changed]
+
+
+@event.listens_for(db.session, "after_commit")
+def update_order_number_index(session):
+    for work_order_no, status in session.info.pop("changed_order_states", ()):
+        order_number_index.update(work_order_no, status)
+
+
+@event.listens_for(db.session, "after_rollback")
+def forget_changed_orders(session):
+    session.info.pop("changed_orders", None)
+    session.info.pop("changed_order_states", None)
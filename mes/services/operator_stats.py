@@ -0,0 +1,92 @@
+"""Per-operator daily output rollup."""
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, case, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from mes.extensions import db
+from mes.helpers import regroup
+from mes.models import ArchivedWorkOrderEvent, OperatorDailyStats, WorkOrderEvent
+from mes.services.history import FINISH_EVENTS
+
+
+def record_operator_activity(operator, completed=0, rejected=0, scans=0, when=None):
+    """Add to an operator's daily rollup row. Runs in the caller's transaction."""
+    if not operator:
+        return
+    day = (when or datetime.utcnow()).date()
+    stmt = sqlite_insert(OperatorDailyStats).values(
+        operator=operator, day=day,
+        completed_qty=completed, rejected_qty=rejected, scans=scans
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OperatorDailyStats.operator, OperatorDailyStats.day],
+        set_={
+            "completed_qty": OperatorDailyStats.completed_qty + completed,
+            "rejected_qty": OperatorDailyStats.rejected_qty + rejected,
+            "scans": OperatorDailyStats.scans + scans,
+        }
+    )
+    db.session.execute(stmt)
+
+
+def rebuild_operator_daily_stats():
+    """Recompute the daily rollup from the order event log, archive included.
+
+    Credits what the live path does: each finished (FINISH_EVENTS, which
+    includes seeded legacy "Waiting for Handover" events) or Rejected
+    quantity to the operator on that event, on the day it was recorded, and
+    one scan per Started, Handed Over or handover Completed event (the one
+    without a quantity). Returns the number of rollup rows written.
+    """
+    OperatorDailyStats.query.delete()
+
+    def daily_activity(events):
+        quantity = func.coalesce(events.quantity, 0)
+        return select(
+            events.operator.label("operator"),
+            func.date(events.ts).label("day"),
+            func.sum(case((events.action.in_(FINISH_EVENTS), quantity), else_=0))
+            .label("completed_qty"),
+            func.sum(case((events.action == "Rejected", quantity), else_=0)).label("rejected_qty"),
+            func.sum(case((events.action.in_(("Started", "Handed Over")), 1),
+                          ((events.action == "Completed") & events.quantity.is_(None), 1),
+                          else_=0)).label("scans"),
+        ).where(events.operator.isnot(None)).group_by(events.operator, func.date(events.ts))
+
+    rows = [
+        {"operator": operator, "day": date.fromisoformat(day), "completed_qty": completed or 0,
+         "rejected_qty": rejected or 0, "scans": scans or 0}
+        for operator, day, completed, rejected, scans in db.session.execute(regroup(
+            daily_activity(WorkOrderEvent), daily_activity(ArchivedWorkOrderEvent),
+            keys=["operator", "day"]
+        ))
+        # Days with only Created or Closed events leave no row on the live path either
+        if completed or rejected or scans
+    ]
+    if rows:
+        db.session.execute(OperatorDailyStats.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def get_operator_stats(username):
+    today = datetime.utcnow().date()
+    week_start = today - timedelta(days=today.weekday())
+
+    # Reads at most seven rollup rows through the (operator, day) primary key
+    row = db.session.query(
+        func.sum(case((OperatorDailyStats.day == today, OperatorDailyStats.completed_qty), else_=0)),
+        func.sum(case((OperatorDailyStats.day == today, OperatorDailyStats.rejected_qty), else_=0)),
+        func.sum(OperatorDailyStats.completed_qty),
+        func.sum(OperatorDailyStats.rejected_qty),
+    ).filter(
+        OperatorDailyStats.operator == username,
+        OperatorDailyStats.day >= week_start
+    ).one()
+
+    return {
+        "daily_completed": row[0] or 0,
+        "daily_rejected": row[1] or 0,
+        "weekly_completed": row[2] or 0,
+        "weekly_rejected": row[3] or 0,
+    }
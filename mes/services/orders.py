@@ -0,0 +1,245 @@
+"""Work order state transitions: scans, finishes and the scanner API events."""
+from datetime import datetime, timezone
+from sqlalchemy.orm.attributes import set_committed_value
+import random
+
+from mes.extensions import db
+from mes.models import RejectionLog, WorkOrder
+from mes.services.geometry import record_geometry_activity
+from mes.services.history import log_order_event
+from mes.services.operator_stats import record_operator_activity
+
+
+class TransitionError(Exception):
+    """A scan or finish that cannot be applied to an order in its current state."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def apply_scan(order, username, machine, when=None):
+    """Run the scan state machine on an order in the caller's transaction.
+
+    Returns "completed" when a handover scan completes the order,
+    "already_completed", "started" or "handed_over".
+    """
+    when = when or datetime.utcnow()
+    # Handover logic: if order is Waiting for Handover, mark as Completed and assign to new operator
+    if order.status == "Waiting for Handover":
+        order.previous_operator = order.current_operator
+        order.current_operator = username
+        order.current_machine = machine
+        order.status = "Completed"
+        order.end_time = when
+        log_order_event(order, "Completed", operator=username, machine=machine,
+                        reason=f"Handed over by {order.previous_operator}"
+                        if order.previous_operator else None,
+                        when=when)
+        record_operator_activity(username, scans=1, when=when)
+        return "completed"
+    if order.status == "Completed":
+        return "already_completed"
+
+    order.previous_operator = order.current_operator
+    order.current_operator = username
+    order.current_machine = machine
+    order.status = "In Progress"
+
+    if not order.start_time:
+        order.start_time = when
+        log_order_event(order, "Started", operator=username, machine=machine, when=when)
+        outcome = "started"
+    else:
+        order.last_handover_time = when
+        log_order_event(order, "Handed Over", operator=username, machine=machine,
+                        reason=f"From {order.previous_operator}"
+                        if order.previous_operator else None,
+                        when=when)
+        outcome = "handed_over"
+
+    record_operator_activity(username, scans=1, when=when)
+    return outcome
+
+
+FINISH_ACTIONS = ("complete", "partial", "reject", "close_order")
+
+
+def validate_finish(order, action, qty, expected_version=None):
+    if expected_version is not None and expected_version != order.version:
+        raise TransitionError(
+            "conflict",
+            f"Work order {order.work_order_no} was updated while this page was open "
+            f"(now {order.status}, {order.completed_qty} completed, {order.rejected_qty} rejected). "
+            "Check it and submit again."
+        )
+    if action not in FINISH_ACTIONS:
+        raise TransitionError("unknown_action", f"Unknown action '{action}'.")
+    if qty <= 0 and action != "close_order":
+        raise TransitionError("invalid_quantity", "Quantity must be greater than 0.")
+    if order.completed_qty + order.rejected_qty + qty > order.quantity:
+        raise TransitionError("over_quantity", f"Cannot exceed total order quantity ({order.quantity}).")
+
+
+def add_order_quantity(order, column, qty, **values):
+    """Atomically add qty to an order's completed_qty or rejected_qty, with other column values.
+
+    The UPDATE only matches while completed_qty + rejected_qty + qty still
+    fits in quantity, so concurrent finishes can neither lose an increment
+    nor overrun the order, and no lock is held between reading the order and
+    writing it. It also bumps version; the returned row becomes the loaded
+    state of `order`. Raises TransitionError when the quantity would overrun.
+    """
+    db.session.flush()
+    table = WorkOrder.__table__
+    names = [column, "version", *values]
+    row = db.session.execute(
+        table.update()
+        .where(table.c.id == order.id,
+               table.c.completed_qty + table.c.rejected_qty + qty <= table.c.quantity)
+        .values({column: table.c[column] + qty, "version": table.c.version + 1, **values})
+        .returning(*(table.c[name] for name in names))
+    ).first()
+    if row is None:
+        db.session.refresh(order)
+        raise TransitionError("over_quantity", f"Cannot exceed total order quantity ({order.quantity}).")
+    for name, value in zip(names, row):
+        set_committed_value(order, name, value)
+
+
+def apply_finish(order, action, qty, role, operator, complaint="", reason="No reason", when=None,
+                 expected_version=None):
+    """Apply a complete, partial, reject or close action in the caller's transaction.
+
+    Operators may complete, partially complete or reject; managers and
+    masters may close. expected_version, when given, is the order version
+    the caller saw; a different current version is a "conflict". Returns
+    the rework order created by a rejection, otherwise None. Raises
+    TransitionError if the action is not allowed.
+    """
+    validate_finish(order, action, qty, expected_version)
+    if role == "operator":
+        if action == "close_order":
+            raise TransitionError("not_allowed", "Operators cannot fully close work orders.")
+    elif role not in ("manager", "master") or action != "close_order":
+        raise TransitionError("not_allowed", f"Role '{role}' cannot {action} work orders.")
+
+    when = when or datetime.utcnow()
+    if complaint:
+        order.complaint = complaint
+
+    if action == "close_order":
+        order.status = "Completed"
+        order.end_time = when
+        log_order_event(order, "Closed", operator=operator, reason=complaint, when=when)
+        return None
+
+    if action in ("complete", "partial"):
+        add_order_quantity(order, "completed_qty", qty, status="Waiting for Handover", end_time=when)
+        log_order_event(order, "Completed" if action == "complete" else "Partial",
+                        operator=order.current_operator, quantity=qty,
+                        reason=complaint, machine=order.current_machine, when=when)
+        record_operator_activity(order.current_operator, completed=qty, when=when)
+        record_geometry_activity(order.geometry_id, completed=qty)
+        return None
+
+    add_order_quantity(order, "rejected_qty", qty, status="Waiting for Handover", end_time=when)
+    db.session.add(RejectionLog(
+        work_order_id=order.id,
+        operator=order.current_operator,
+        quantity=qty,
+        reason=reason,
+        timestamp=when,
+    ))
+    record_operator_activity(order.current_operator, rejected=qty, when=when)
+    record_geometry_activity(order.geometry_id, rejected=qty)
+    log_order_event(order, "Rejected", operator=order.current_operator,
+                    quantity=qty, reason=reason, machine=order.current_machine, when=when)
+
+    # Auto-create rework order
+    new_order = WorkOrder(
+        work_order_no=f"{order.work_order_no}-R{random.randint(1000, 9999)}",
+        client_name=order.client_name,
+        po_number=order.po_number,
+        part_name=order.part_name,
+        quantity=qty,
+        diameter=order.diameter,
+        flute_length=order.flute_length,
+        overall_length=order.overall_length,
+        due_date=order.due_date,
+        status="Not Started",
+        complaint=complaint or None,
+        geometry_id=order.geometry_id,
+    )
+    db.session.add(new_order)
+    record_geometry_activity(new_order.geometry_id, orders=1)
+    log_order_event(new_order, "Created", operator=order.current_operator,
+                    reason=f"Rework of {order.work_order_no}", when=when)
+    return new_order
+
+
+# ---------- SCANNER API ----------
+SCAN_BATCH_MAX_EVENTS = 500
+SCAN_KEY_RETENTION_DAYS = 30
+
+
+def parse_event_time(value):
+    """Parse an ISO-8601 client timestamp to naive UTC, never later than now."""
+    now = datetime.utcnow()
+    if not value:
+        return now
+    ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(ts, now)
+
+
+def apply_scan_event(item, username, role):
+    """Apply one API event and return its compact result (without the key).
+
+    Raises TransitionError for a finish the order's state does not allow;
+    the caller rolls back whatever the event had already changed.
+    """
+    order = WorkOrder.query.filter_by(work_order_no=str(item.get("work_order_no", ""))).first()
+    if not order:
+        return {"ok": False, "error": "not_found"}
+    try:
+        when = parse_event_time(item.get("ts"))
+    except ValueError:
+        return {"ok": False, "error": "invalid_ts"}
+
+    kind = item.get("type")
+    result = {"ok": True}
+    if kind == "scan":
+        result["result"] = apply_scan(order, item.get("operator") or username,
+                                      item.get("machine"), when=when)
+    elif kind == "finish":
+        try:
+            qty = int(item.get("quantity") or 0)
+        except (TypeError, ValueError):
+            qty = 0
+        try:
+            expected_version = int(item["version"]) if item.get("version") is not None else None
+        except (TypeError, ValueError):
+            return {"ok": False, "error": "invalid_version"}
+        rework_order = apply_finish(
+            order, item.get("action"), qty, role, username,
+            complaint=(item.get("complaint") or "").strip(),
+            reason=item.get("reason") or "No reason", when=when,
+            expected_version=expected_version
+        )
+        result["result"] = item.get("action")
+        if rework_order is not None:
+            result["rework_order"] = rework_order.work_order_no
+    else:
+        return {"ok": False, "error": "unknown_type"}
+
+    db.session.flush()
+    result.update({
+        "status": order.status,
+        "completed_qty": order.completed_qty,
+        "rejected_qty": order.rejected_qty,
+        "version": order.version,
+    })
+    return result
@@ -0,0 +1,175 @@
+"""QR labels per work order: rendering, the in-memory cache and background prerendering."""
+from flask import current_app
+import os
+import io
+import hashlib
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from mes.instrumentation import METRICS, current_endpoint
+
+
+QR_FOLDER = os.path.join("static", "qrcodes")
+
+QR_WORKERS = 2
+QR_MAX_PENDING = 64
+LABEL_FONTS = ("arial.ttf", "DejaVuSans.ttf")
+
+
+@lru_cache(maxsize=None)
+def get_label_font():
+    """Load the label font once per process instead of on every render."""
+    from PIL import ImageFont
+
+    for name in LABEL_FONTS:
+        try:
+            return ImageFont.truetype(name, 18)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def render_qr_label(order_no):
+    # qrcode and PIL cost ~30 ms and several MB per worker, so they load on the first label
+    import qrcode
+    from PIL import Image, ImageDraw
+
+    start = time.perf_counter()
+    qr = qrcode.make(order_no).convert("RGB")
+
+    width, height = qr.size
+    new_height = height + 40
+    img_with_text = Image.new("RGB", (width, new_height), "white")
+    img_with_text.paste(qr, (0, 0))
+
+    draw = ImageDraw.Draw(img_with_text)
+    font = get_label_font()
+
+    bbox = draw.textbbox((0, 0), order_no, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_x = (width - text_width) // 2
+
+    draw.text((text_x, height + 10), order_no, fill="black", font=font)
+    METRICS["qr"].observe(current_endpoint(), time.perf_counter() - start)
+    return img_with_text
+
+
+def qr_label_path(order_no):
+    return os.path.join(QR_FOLDER, f"{order_no}.png")
+
+
+def generate_qr_with_text(order_no):
+    filepath = qr_label_path(order_no)
+    img = render_qr_label(order_no)
+    os.makedirs(QR_FOLDER, exist_ok=True)
+    # Write to a temp file first so a polling page never sees a half-written PNG
+    tmp_path = f"{filepath}.{threading.get_ident()}.tmp"
+    img.save(tmp_path, format="PNG")
+    os.replace(tmp_path, filepath)
+    return filepath
+
+
+# Label rendering runs on a small bounded pool so requests only pay for the DB commit
+qr_executor = ThreadPoolExecutor(max_workers=QR_WORKERS, thread_name_prefix="qr-label")
+qr_jobs = {}
+qr_jobs_lock = threading.Lock()
+
+
+def _qr_job_done(order_no, future):
+    if future.exception() is None:
+        with qr_jobs_lock:
+            if qr_jobs.get(order_no) is future:
+                del qr_jobs[order_no]
+
+
+def queue_qr_label(order_no, inline_when_full=True):
+    """Render an order's QR label in the background.
+
+    When the queue is full the label is rendered inline, which throttles
+    callers instead of letting the backlog grow without bound; bulk callers
+    pass inline_when_full=False to skip it and leave it to /qr/<order>.png.
+    Does nothing when QR_PRERENDER is off.
+    """
+    if not current_app.config["QR_PRERENDER"]:
+        return None
+    with qr_jobs_lock:
+        future = qr_jobs.get(order_no)
+        if future is not None and not future.done():
+            return future
+        queue_full = sum(1 for f in qr_jobs.values() if not f.done()) >= QR_MAX_PENDING
+        if not queue_full:
+            future = qr_executor.submit(generate_qr_with_text, order_no)
+            qr_jobs[order_no] = future
+    if queue_full:
+        if inline_when_full:
+            generate_qr_with_text(order_no)
+        return None
+    future.add_done_callback(lambda f: _qr_job_done(order_no, f))
+    return future
+
+
+class LabelCache:
+    """Thread-safe LRU of encoded label PNGs, bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, data, etag):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key)[0])
+            self.entries[key] = (data, etag)
+            self.size += len(data)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, (old_data, _) = self.entries.popitem(last=False)
+                self.size -= len(old_data)
+
+
+QR_CACHE_MAX_BYTES = 16 * 1024 * 1024
+QR_CACHE_MAX_AGE = 30 * 24 * 3600
+qr_cache = LabelCache(QR_CACHE_MAX_BYTES)
+
+
+def qr_label_bytes(order_no):
+    """Return (png_bytes, etag) for a label: memory cache, then disk, then a fresh render."""
+    entry = qr_cache.get(order_no)
+    if entry is not None:
+        return entry
+    filepath = qr_label_path(order_no)
+    if os.path.exists(filepath):
+        with open(filepath, "rb") as f:
+            data = f.read()
+    else:
+        buffer = io.BytesIO()
+        render_qr_label(order_no).save(buffer, format="PNG")
+        data = buffer.getvalue()
+    etag = hashlib.sha256(data).hexdigest()[:32]
+    qr_cache.put(order_no, data, etag)
+    return data, etag
+
+
+def qr_label_status(order_no):
+    """Return "ready", "pending", "failed" or "missing" for an order's label."""
+    with qr_jobs_lock:
+        future = qr_jobs.get(order_no)
+    if future is not None:
+        if not future.done():
+            return "pending"
+        if future.exception() is not None:
+            return "failed"
+    if qr_cache.get(order_no) is not None or os.path.exists(qr_label_path(order_no)):
+        return "ready"
+    return "missing"
@@ -0,0 +1,103 @@
+"""Full-text work order search."""
+from sqlalchemy import select, text
+
+from mes.extensions import db
+from mes.models import ArchivedWorkOrder, WorkOrder
+
+
+# External-content FTS5 tables over WorkOrder and its archive, kept in sync by
+# triggers so every ORM or raw write path updates the index in the same transaction.
+def search_index_ddl(table):
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+            work_order_no, client_name, po_number, part_name, current_operator,
+            content='{table}', content_rowid='id'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {table}_fts(rowid, work_order_no, client_name, po_number, part_name, current_operator)
+            VALUES (new.id, new.work_order_no, new.client_name, new.po_number, new.part_name, new.current_operator);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {table}_fts({table}_fts, rowid, work_order_no, client_name, po_number, part_name, current_operator)
+            VALUES ('delete', old.id, old.work_order_no, old.client_name, old.po_number, old.part_name, old.current_operator);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_fts_au
+        AFTER UPDATE OF work_order_no, client_name, po_number, part_name, current_operator ON {table} BEGIN
+            INSERT INTO {table}_fts({table}_fts, rowid, work_order_no, client_name, po_number, part_name, current_operator)
+            VALUES ('delete', old.id, old.work_order_no, old.client_name, old.po_number, old.part_name, old.current_operator);
+            INSERT INTO {table}_fts(rowid, work_order_no, client_name, po_number, part_name, current_operator)
+            VALUES (new.id, new.work_order_no, new.client_name, new.po_number, new.part_name, new.current_operator);
+        END""",
+    ]
+
+
+SEARCH_MODELS = (WorkOrder, ArchivedWorkOrder)
+# bm25 column weights: order number, client, PO, part, operator
+SEARCH_WEIGHTS = "10.0, 2.0, 5.0, 3.0, 1.0"
+SEARCH_PAGE_SIZE = 25
+
+_search_index_ready = False
+
+
+def ensure_search_index(rebuild=False):
+    """Create the FTS tables and triggers if missing, populating them from existing orders."""
+    global _search_index_ready
+    for model in SEARCH_MODELS:
+        table = model.__table__.name
+        exists = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {"name": f"{table}_fts"}).first()
+        for ddl in search_index_ddl(table):
+            db.session.execute(text(ddl))
+        if rebuild or not exists:
+            db.session.execute(text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"))
+    db.session.commit()
+    _search_index_ready = True
+
+
+def build_match_query(query):
+    """Turn free text into an FTS5 query that prefix-matches every term."""
+    terms = []
+    for word in query.split():
+        word = word.replace('"', "")
+        if word:
+            terms.append(f'"{word}"*')
+    return " ".join(terms)
+
+
+def _search_table(model, match, limit, offset):
+    table = model.__table__.name
+    stmt = select(model).from_statement(text(
+        f"SELECT {table}.* FROM {table}_fts "
+        f"JOIN {table} ON {table}.id = {table}_fts.rowid "
+        f"WHERE {table}_fts MATCH :match "
+        f"ORDER BY bm25({table}_fts, {SEARCH_WEIGHTS}), {table}.id DESC "
+        "LIMIT :limit OFFSET :offset"
+    ).bindparams(match=match, limit=limit, offset=offset))
+    return db.session.execute(stmt).scalars().all()
+
+
+def search_workorders_ranked(query, page=1, per_page=SEARCH_PAGE_SIZE):
+    """Return one page of best-matching work orders and whether more pages exist.
+
+    Live orders rank first; archived matches follow once they run out.
+    """
+    if not _search_index_ready:
+        ensure_search_index()
+    match = build_match_query(query)
+    if not match:
+        return [], False
+    offset = (page - 1) * per_page
+    results = _search_table(WorkOrder, match, per_page + 1, offset)
+    if len(results) > per_page:
+        return results[:per_page], True
+
+    if results:
+        live_matches = offset + len(results)
+    else:
+        live_matches = db.session.execute(text(
+            "SELECT COUNT(*) FROM work_order_fts WHERE work_order_fts MATCH :match"
+        ), {"match": match}).scalar()
+    wanted = per_page - len(results)
+    results += _search_table(ArchivedWorkOrder, match, wanted + 1, max(0, offset - live_matches))
+    return results[:per_page], len(results) > per_page
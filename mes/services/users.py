@@ -0,0 +1,67 @@
+"""Shop-floor accounts."""
+
+
+from mes.cache import bump_data_version
+from mes.extensions import db
+from mes.models import User
+
+
+# Shop-floor accounts created on a fresh install; each must set a new PIN on first login
+PREDEFINED_USERS = [
+    ("Anushwa", "000000", "master"),
+    ("Jayant", "000000", "master"),
+    ("SUSHIL BABAR", "000000", "operator"),
+    ("ANIL PARGAVE", "000000", "operator"),
+    ("POOJA CHAVAN", "000000", "operator"),
+    ("ANIL ADSULE", "000000", "operator"),
+    ("RAMESH KOKATE", "000000", "operator"),
+    ("VISHAL KAKADE", "000000", "operator"),
+    ("SAGAR GAVDE", "000000", "operator"),
+    ("VISHAL MADHAV THORAT", "000000", "operator"),
+    ("VIKAS BHAGWAN GADEKAR", "000000", "operator"),
+    ("MUKESH BINAY RAJBHAR", "000000", "operator"),
+    ("ANIL PAWAR", "000000", "operator"),
+    ("SUNIL PAWAR", "000000", "operator"),
+    ("SUSHIL GADE", "000000", "operator"),
+    ("DNYANESHWAR HIMMAT BAGUL", "000000", "operator"),
+    ("AKHADE KISHORKUMAR OMPRAKASH", "000000", "operator"),
+    ("AJINKYA PASHEWAD", "000000", "operator"),
+    ("VISHAL BIDGAR", "000000", "operator"),
+    ("ABHISHEK KARNALE", "000000", "operator"),
+    ("LALMANI YADAV", "000000", "operator"),
+    ("KRISHNA LAVATE", "000000", "operator"),
+    ("NITESH SHARMA", "000000", "operator"),
+    ("LAXMAN GADEKAR", "000000", "operator"),
+    ("ROHIT RAJBHAR", "000000", "operator"),
+    ("SANTOSH MULEY", "000000", "operator"),
+    ("SHANKAR BAHIRAT", "000000", "operator"),
+    ("GOVIND KHOSE", "000000", "manager"),
+    ("PRATIBHA KANADE", "000000", "operator"),
+    ("SHITAL SUTAR", "000000", "operator"),
+    ("SWATI DEOKAR", "000000", "operator"),
+    ("JYOTI KAMBLE", "000000", "operator"),
+    ("PRAKASH SINGH SAINI", "000000", "manager"),
+    ("TULSIDAS WAGHAMARE", "000000", "manager"),
+    ("DHANASHREE JAGTAP", "000000", "manager"),
+    ("PALLAVI KUKADE", "000000", "operator"),
+    ("NIKKI THAKER", "000000", "operator"),
+    ("VINAY KUMAR", "000000", "operator"),
+    ("ROHIT KAMBLE", "000000", "manager"),
+    ("CHHAT BAI SAHU", "000000", "operator"),
+    ("GAJANAN GIRAMKAR", "000000", "operator"),
+    ("SUSHILA KARSH", "000000", "operator"),
+]
+
+
+def seed_users():
+    """Add any PREDEFINED_USERS that are missing. Returns how many were created."""
+    existing = {name for (name,) in db.session.query(User.username)}
+    created = 0
+    for username, pin, role in PREDEFINED_USERS:
+        if username not in existing:
+            db.session.add(User(username=username, pin=pin, role=role, must_change_pin=True))
+            created += 1
+    if created:
+        bump_data_version()
+    db.session.commit()
+    return created